@@ -0,0 +1,140 @@
+# agg_resolver.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Reference files in priority order: the first file to describe a key wins
+# (clean_table_3_4 runs before merge_agg_reference, so it reads the sources of
+# agg_reference_merged.csv; later stages can pass [MERGED_PATH] instead)
+REFERENCE_PATHS = [
+    "cleansed/agg_reference_extended.csv",
+    "cleansed/agg_reference.csv",
+]
+MERGED_PATH = "cleansed/agg_reference_merged.csv"
+MANUAL_PATH = "manual_agg_ref.txt"
+
+NGRAM = 3
+MIN_FUZZY_SCORE = 0.85
+
+# Words that change the meaning of an otherwise near-identical description
+# ("including" vs "excluding automotive fuel"); a fuzzy match must agree on them
+CONTRAST_WORDS = {"including", "excluding", "non", "total", "all", "large", "small", "other"}
+
+
+def normalise_description(values):
+    """Lower-case, '&' -> 'and', punctuation to spaces, single spaces.
+
+    "All Retailing, Including Automotive Fuel" and "All retailing including
+    automotive fuel" normalise to the same key.
+    """
+    text = pd.Series(values, dtype=object).fillna("").astype(str).str.lower()
+    text = text.str.replace("&", " and ", regex=False)
+    text = text.str.replace(r"[^0-9a-z]+", " ", regex=True)
+    return text.str.strip()
+
+
+def normalise_code(values):
+    """agg_sic_code as merge_agg_reference writes it: upper case, no spaces."""
+    return pd.Series(values, dtype=object).fillna("").astype(str).str.upper().str.replace(" ", "", regex=False)
+
+
+def _ngrams(key, n=NGRAM):
+    padded = f" {key} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class AggResolver:
+    """Resolve time_period_description text to agg_sic_code in batches.
+
+    Built once from reference rows (agg_sic_code, time_period_description,
+    note_ref). Exact matches go through a hash index on the normalised description;
+    the rest fall back to a character trigram index scored with the Dice
+    coefficient, accepted at min_score or above when the CONTRAST_WORDS agree.
+    """
+
+    def __init__(self, reference, min_score=MIN_FUZZY_SCORE):
+        reference = reference.reindex(columns=["agg_sic_code", "time_period_description", "note_ref"])
+        reference = reference.assign(
+            key=normalise_description(reference["time_period_description"]).to_numpy(),
+            agg_sic_code=normalise_code(reference["agg_sic_code"]).to_numpy(),
+            note_ref=reference["note_ref"].fillna("").astype(str).str.strip().to_numpy(),
+        )
+        reference = reference[(reference["key"] != "") & (reference["agg_sic_code"] != "")]
+        self.reference = reference.drop_duplicates("key", keep="first").reset_index(drop=True)
+        self.min_score = min_score
+        self.exact = pd.Series(self.reference.index, index=self.reference["key"])
+
+        # Inverted index: n-gram -> array of reference rows containing it
+        postings = {}
+        self.gram_counts = np.zeros(len(self.reference), dtype=np.int64)
+        for row, key in enumerate(self.reference["key"]):
+            grams = _ngrams(key)
+            self.gram_counts[row] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+        self.postings = {gram: np.array(rows, dtype=np.int64) for gram, rows in postings.items()}
+
+    @classmethod
+    def from_files(cls, paths=REFERENCE_PATHS, manual_path=MANUAL_PATH, **kwargs):
+        """Build from the agg reference CSVs that exist plus manual_agg_ref.txt."""
+        frames = [pd.read_csv(path, dtype=str) for path in paths if os.path.exists(path)]
+        if manual_path and os.path.exists(manual_path):
+            frames.append(pd.read_csv(manual_path, sep="|", dtype=str))
+        reference = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        return cls(reference, **kwargs)
+
+    def _fuzzy(self, key):
+        """Best (row, score) for one normalised key, or (-1, 0.0)."""
+        grams = _ngrams(key)
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return -1, 0.0
+        overlap = np.bincount(np.concatenate(hits), minlength=len(self.reference))
+        scores = 2.0 * overlap / (len(grams) + self.gram_counts)
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def resolve(self, descriptions):
+        """Resolve a column of descriptions in one call.
+
+        Returns a frame aligned with the input: agg_sic_code, note_ref,
+        matched_description, confidence (1.0 exact, otherwise the Dice score)
+        and method ("exact", "fuzzy" or "" when no candidate was accepted).
+        Unresolved rows keep their best candidate in matched_description so
+        it can be reviewed. Each distinct description is looked up once.
+        """
+        keys = normalise_description(descriptions)
+        codes, uniques = pd.factorize(keys)
+        rows = self.exact.reindex(uniques).to_numpy(dtype=float, copy=True)
+        confidence = np.where(np.isnan(rows), 0.0, 1.0)
+        method = np.where(np.isnan(rows), "", "exact").astype(object)
+        candidate = rows.copy()
+
+        for i in np.flatnonzero(np.isnan(rows)):
+            if not uniques[i]:
+                continue
+            best, score = self._fuzzy(uniques[i])
+            if best < 0:
+                continue
+            candidate[i] = best
+            confidence[i] = score
+            words = set(uniques[i].split()), set(self.reference.at[best, "key"].split())
+            agrees = CONTRAST_WORDS & words[0] == CONTRAST_WORDS & words[1]
+            if score >= self.min_score and agrees:
+                rows[i] = best
+                method[i] = "fuzzy"
+
+        picked = self.reference.reindex(np.nan_to_num(rows, nan=-1))
+        result = pd.DataFrame({
+            "agg_sic_code": picked["agg_sic_code"].fillna("").to_numpy(),
+            "note_ref": picked["note_ref"].fillna("").to_numpy(),
+            "matched_description": self.reference["time_period_description"]
+                .reindex(np.nan_to_num(candidate, nan=-1)).fillna("").to_numpy(),
+            "confidence": confidence,
+            "method": method,
+        })
+        result = result.iloc[codes].reset_index(drop=True)
+        result.index = keys.index
+        return result
@@ -0,0 +1,240 @@
+# anomaly.py
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from rsi_schema import read_merged_csv
+
+MERGED_CSV = "cleansed/rsi_data_merged.csv"
+ANOMALIES_PATH = "cleansed/anomalies.csv"
+NEW_ANOMALIES_PATH = "cleansed/anomalies_new.csv"
+STATE_PATH = "cleansed/anomaly_state.csv"
+
+# Same identity as ingest.DIFF_KEY without the period; table_code is left out
+# because a reworded table name changes it and would orphan the stored state
+SERIES_KEY = ["sheet_name", "dataset_code", "agg_sic_code", "frequency"]
+
+# Trailing window (previous observations) for the rolling z-score
+WINDOWS = {"monthly": 12, "quarterly": 8, "annual": 5}
+MIN_PERIODS = 4
+
+# |z| above which a value is flagged, per frequency and method
+THRESHOLDS = {
+    "monthly": {"global": 2.5, "rolling": 3.0, "robust": 3.5},
+    "quarterly": {"global": 2.5, "rolling": 3.0, "robust": 3.5},
+    "annual": {"global": 2.0, "rolling": 2.5, "robust": 3.0},
+}
+DEFAULT_FREQUENCY = "monthly"
+METHODS = ["global", "rolling", "robust"]
+
+# Scales the MAD so the robust z-score matches the normal z-score
+MAD_SCALE = 0.6745
+
+
+def _series_ids(df):
+    return df.groupby(SERIES_KEY, dropna=False, observed=True, sort=False).ngroup().to_numpy()
+
+
+def _rolling_z(values, groups, windows, min_periods=MIN_PERIODS):
+    """z-score of each value against the previous `windows` values of its own group.
+
+    values/groups/windows are aligned arrays already sorted by group then
+    period. Window sums come from one prefix sum over the whole array, so
+    there is no loop over groups or windows.
+    """
+    n = len(values)
+    if not n:
+        return np.array([])
+    starts = np.r_[0, np.flatnonzero(groups[1:] != groups[:-1]) + 1]
+    group_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+    position = np.arange(n) - group_start
+
+    # Centre each group before summing squares to keep the sums well conditioned
+    centre = np.repeat(values[starts], np.diff(np.r_[starts, n]))
+    x = values - centre
+    p1 = np.r_[0.0, np.cumsum(x)]
+    p2 = np.r_[0.0, np.cumsum(x * x)]
+
+    count = np.minimum(position, windows)
+    idx = np.arange(n)
+    first = idx - count
+    s1 = p1[idx] - p1[first]
+    s2 = p2[idx] - p2[first]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s1 / count
+        var = (s2 - count * mean * mean) / (count - 1)
+        z = (x - mean) / np.sqrt(var)
+    z[(count < min_periods) | ~(var > 1e-12)] = np.nan
+    return z
+
+
+def _flag(scored, thresholds):
+    """Add is_anomaly and the comma-separated methods that flagged each row."""
+    frequency = scored["frequency"].astype(str).where(scored["frequency"].astype(str).isin(thresholds),
+                                                      DEFAULT_FREQUENCY)
+    flagged = {}
+    for method in METHODS:
+        limit = frequency.map({freq: limits[method] for freq, limits in thresholds.items()})
+        flagged[method] = scored[f"z_{method}"].abs() > limit
+    scored["is_anomaly"] = np.logical_or.reduce([flagged[m].to_numpy() for m in METHODS])
+    methods = pd.Series("", index=scored.index)
+    for method in METHODS:
+        methods = methods + np.where(flagged[method], "," + method, "")
+    scored["methods"] = methods.str.lstrip(",")
+    return scored
+
+
+def score_series(df, windows=WINDOWS, thresholds=THRESHOLDS):
+    """Global, rolling and robust (median/MAD) z-scores for every series at once.
+
+    Returns the observations sorted by series and period_key with z_global,
+    z_rolling, z_robust, is_anomaly and methods columns.
+    """
+    obs = df.dropna(subset=["value", "period_key"])[SERIES_KEY + ["date", "period_key", "value"]]
+    obs = obs.astype({col: object for col in SERIES_KEY + ["date"]})
+    groups = _series_ids(obs)
+    order = np.lexsort((obs["period_key"].to_numpy(), groups))
+    obs = obs.iloc[order].reset_index(drop=True)
+    groups = groups[order]
+
+    value = obs["value"].to_numpy(dtype=float)
+    by_series = obs.groupby(groups, sort=False)["value"]
+    mean = by_series.transform("mean").to_numpy()
+    std = by_series.transform("std").to_numpy()
+    median = by_series.transform("median").to_numpy()
+    mad = pd.Series(np.abs(value - median)).groupby(groups, sort=False).transform("median").to_numpy()
+
+    window = obs["frequency"].map(windows).fillna(windows[DEFAULT_FREQUENCY]).to_numpy(dtype=int)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        obs["z_global"] = np.where(std > 0, (value - mean) / std, np.nan)
+        obs["z_rolling"] = _rolling_z(value, groups, window)
+        obs["z_robust"] = np.where(mad > 0, MAD_SCALE * (value - median) / mad, np.nan)
+    return _flag(obs, thresholds)
+
+
+def build_state(scored, windows=WINDOWS):
+    """Running statistics per series (Welford n/mean/m2, median/MAD, last window) for incremental scoring."""
+    scored = scored.assign(deviation=(scored["value"] - scored.groupby(
+        SERIES_KEY, dropna=False, sort=False)["value"].transform("median")).abs())
+    by_series = scored.groupby(SERIES_KEY, dropna=False, sort=False)
+    state = by_series.agg(n=("value", "size"), mean=("value", "mean"), var=("value", "var"),
+                          median=("value", "median"), mad=("deviation", "median"),
+                          last_period_key=("period_key", "max")).reset_index()
+    state["m2"] = state.pop("var").fillna(0.0) * (state["n"] - 1)
+    tails = by_series.tail(max(windows.values()))
+    state["window"] = tails.groupby(SERIES_KEY, dropna=False, sort=False)["value"] \
+        .agg(lambda v: json.dumps(v.tolist())).to_numpy()
+    return state
+
+
+def score_incremental(df, state, windows=WINDOWS, thresholds=THRESHOLDS):
+    """Score only periods after each series' last_period_key, using the stored statistics.
+
+    Global and robust z-scores compare new values with the history the state
+    was built from; the rolling z-score continues from the stored window.
+    Series not in the state are scored from scratch. Returns (scored new
+    rows, updated state); median/MAD are only refreshed by a full run.
+    """
+    obs = df.dropna(subset=["value", "period_key"])[SERIES_KEY + ["date", "period_key", "value"]]
+    obs = obs.astype({col: object for col in SERIES_KEY + ["date"]})
+    # States saved while table_code was part of the key still carry the column
+    state = state.drop(columns="table_code", errors="ignore").astype({col: object for col in SERIES_KEY})
+    known = obs.merge(state[SERIES_KEY + ["last_period_key"]], on=SERIES_KEY, how="left")
+    is_new = (known["last_period_key"].isna() | (known["period_key"] > known["last_period_key"])).to_numpy()
+    new = obs[is_new]
+    fresh = new.merge(state[SERIES_KEY], on=SERIES_KEY, how="left", indicator=True)["_merge"].eq("left_only")
+    fresh_rows = new[fresh.to_numpy()]
+    new = new[~fresh.to_numpy()]
+
+    # Stored window values go in front of the new values (with period_key below
+    # every real one) so the shared rolling function sees the full window
+    history = state[SERIES_KEY + ["window"]].copy()
+    history["value"] = history.pop("window").map(json.loads)
+    history = history.explode("value").dropna(subset=["value"])
+    history["period_key"] = -1 - history.groupby(SERIES_KEY, dropna=False).cumcount(ascending=False)
+    history = history.merge(new[SERIES_KEY].drop_duplicates(), on=SERIES_KEY)
+    combined = pd.concat([history.assign(date="", is_new=False), new.assign(is_new=True)], ignore_index=True)
+    combined["value"] = combined["value"].astype(float)
+
+    groups = _series_ids(combined)
+    order = np.lexsort((combined["period_key"].to_numpy(dtype=float), groups))
+    combined = combined.iloc[order].reset_index(drop=True)
+    window = combined["frequency"].map(windows).fillna(windows[DEFAULT_FREQUENCY]).to_numpy(dtype=int)
+    combined["z_rolling"] = _rolling_z(combined["value"].to_numpy(), groups[order], window)
+
+    scored = combined[combined["is_new"]].drop(columns="is_new").merge(state, on=SERIES_KEY, how="left")
+    std = np.sqrt(scored["m2"] / (scored["n"] - 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scored["z_global"] = ((scored["value"] - scored["mean"]) / std).where(std > 0)
+        scored["z_robust"] = (MAD_SCALE * (scored["value"] - scored["median"]) / scored["mad"]).where(scored["mad"] > 0)
+    scored = _flag(scored[SERIES_KEY + ["date", "period_key", "value", "z_global", "z_rolling", "z_robust"]]
+                   .reset_index(drop=True), thresholds)
+
+    # Merge the new values into the running statistics (Chan et al. parallel update)
+    added = scored.groupby(SERIES_KEY, dropna=False).agg(
+        n_b=("value", "size"), mean_b=("value", "mean"), var_b=("value", "var"),
+        last_b=("period_key", "max"), window_b=("value", lambda v: v.tolist())).reset_index()
+    added = added.astype({col: object for col in SERIES_KEY})
+    updated = state.merge(added, on=SERIES_KEY, how="left")
+    has_new = updated["n_b"].notna()
+    n_a, n_b = updated["n"], updated["n_b"].fillna(0)
+    delta = updated["mean_b"] - updated["mean"]
+    total = n_a + n_b
+    updated.loc[has_new, "m2"] = (updated["m2"] + updated["var_b"].fillna(0.0) * (n_b - 1).clip(lower=0)
+                                  + delta ** 2 * n_a * n_b / total)[has_new]
+    updated.loc[has_new, "mean"] = (updated["mean"] + delta * n_b / total)[has_new]
+    updated.loc[has_new, "n"] = total[has_new]
+    updated.loc[has_new, "last_period_key"] = updated["last_b"][has_new]
+    keep = max(windows.values())
+    updated.loc[has_new, "window"] = [
+        json.dumps((json.loads(old) + list(extra))[-keep:])
+        for old, extra in zip(updated.loc[has_new, "window"], updated.loc[has_new, "window_b"])
+    ]
+    updated = updated[state.columns]
+
+    if not fresh_rows.empty:
+        fresh_scored = score_series(fresh_rows, windows, thresholds)
+        scored = pd.concat([scored, fresh_scored], ignore_index=True)
+        updated = pd.concat([updated, build_state(fresh_scored, windows)], ignore_index=True)
+    return scored, updated
+
+
+def save_scores(scored, state, output):
+    """Write the flagged rows and the running statistics."""
+    anomalies = scored[scored["is_anomaly"]]
+    anomalies.to_csv(output, index=False)
+    state.to_csv(STATE_PATH, index=False)
+    print(f"🔍 Scored {len(scored)} values in {len(state)} series, {len(anomalies)} flagged")
+    print("✅ Saved:", output, "and", STATE_PATH)
+    return anomalies
+
+
+def update_incremental(df):
+    """Score df's new periods against the stored state (full run if there is none yet)."""
+    if not os.path.exists(STATE_PATH):
+        scored = score_series(df)
+        return save_scores(scored, build_state(scored), ANOMALIES_PATH)
+    scored, state = score_incremental(df, pd.read_csv(STATE_PATH))
+    return save_scores(scored, state, NEW_ANOMALIES_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag anomalous values in rsi_data_merged.")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"score only periods newer than {STATE_PATH} and update it")
+    args = parser.parse_args()
+
+    df = read_merged_csv(MERGED_CSV)
+    if args.incremental:
+        update_incremental(df)
+    else:
+        scored = score_series(df)
+        save_scores(scored, build_state(scored), ANOMALIES_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# artifact_cache.py
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+
+from run_manifest import FileStats, expand
+
+CACHE_DIR = ".rsi_cache/artifacts"
+# Bump when the cache layout or key recipe changes
+CACHE_VERSION = 1
+
+# Environment variables that change what a stage produces (RSI_SHEET_WORKERS only changes speed)
+KEY_ENV = ["RSI_XLSX_BACKEND", "RSI_SERIES_CSV"]
+
+
+def local_imports(path, script_dir):
+    """Module files in script_dir that path imports, directly or through each other."""
+    seen = set()
+    todo = [os.path.abspath(path)]
+    while todo:
+        current = todo.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        with open(current, "rb") as fh:
+            tree = ast.parse(fh.read(), filename=current)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = os.path.join(script_dir, name.split(".")[0] + ".py")
+                if os.path.exists(candidate):
+                    todo.append(os.path.abspath(candidate))
+    return sorted(seen)
+
+
+def code_hash(script, script_dir):
+    """sha256 over the stage script and every local module it imports."""
+    sha = hashlib.sha256()
+    for path in local_imports(os.path.join(script_dir, script), script_dir):
+        with open(path, "rb") as fh:
+            sha.update(os.path.basename(path).encode() + b"\0" + hashlib.sha256(fh.read()).hexdigest().encode())
+    return sha.hexdigest()
+
+
+class ArtifactCache:
+    """Content-addressed store of stage outputs, keyed by stage code + input hashes.
+
+    Files live once under objects/<sha256>; entries/<key>.json lists, for one
+    stage run, every declared output path (files of output folders listed one
+    by one) with its object hash, or null if the stage left it absent.
+    Restoring copies objects back rather than hard-linking them, since later
+    stages rewrite some outputs in place (table_name_clean.py rewrites
+    rsi_data_merged.csv) and that would change the stored object.
+    """
+
+    def __init__(self, path=CACHE_DIR, script_dir=None, stats=None):
+        self.path = path
+        self.script_dir = script_dir or os.path.dirname(os.path.abspath(__file__))
+        self.stats = stats or FileStats()
+        self._code = {}
+
+    def key(self, stage, inputs):
+        """Cache key of a stage given the stats of its declared inputs (FileStats.paths)."""
+        script = stage["script"]
+        if script not in self._code:
+            self._code[script] = code_hash(script, self.script_dir)
+        payload = {
+            "version": CACHE_VERSION,
+            "script": script,
+            "code": self._code[script],
+            "inputs": [[i["path"], i["sha256"]] for i in inputs],
+            "writes": stage["writes"],
+            "env": {name: os.environ.get(name) for name in KEY_ENV},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, "entries", f"{key}.json")
+
+    def _object_path(self, sha):
+        return os.path.join(self.path, "objects", sha[:2], sha)
+
+    def store(self, key, stage):
+        """Save the stage's declared outputs under key."""
+        files = {}
+        for declared in stage["writes"]:
+            for path in expand(declared):
+                if os.path.isdir(path):
+                    for root, dirs, names in os.walk(path):
+                        dirs.sort()
+                        for name in sorted(names):
+                            files[os.path.join(root, name)] = self._add_object(os.path.join(root, name))
+                    files.setdefault(path + os.sep, "dir")
+                elif os.path.isfile(path):
+                    files[path] = self._add_object(path)
+                else:
+                    files[path] = None
+
+        entry = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        with open(entry + ".tmp", "w") as fh:
+            json.dump({"script": stage["script"], "files": files}, fh, indent=1)
+        os.replace(entry + ".tmp", entry)
+
+    def _add_object(self, path):
+        sha = self.stats.file(path)["sha256"]
+        target = self._object_path(sha)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(path, target + ".tmp")
+            os.replace(target + ".tmp", target)
+        return sha
+
+    def has(self, key):
+        """True if a stage run with this key has been stored."""
+        return os.path.exists(self._entry_path(key))
+
+    def restore(self, key, stage):
+        """Put a cached run's outputs back in place; returns False if key is not cached."""
+        entry = self._entry_path(key)
+        if not os.path.exists(entry):
+            return False
+        with open(entry) as fh:
+            files = json.load(fh)["files"]
+        if any(sha not in (None, "dir") and not os.path.exists(self._object_path(sha)) for sha in files.values()):
+            return False
+
+        # Output folders are replaced as a whole so no stale files are left behind
+        for path, sha in files.items():
+            if sha == "dir":
+                shutil.rmtree(path.rstrip(os.sep), ignore_errors=True)
+                os.makedirs(path, exist_ok=True)
+        for path, sha in files.items():
+            if sha == "dir":
+                continue
+            if sha is None:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+                continue
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            shutil.copy2(self._object_path(sha), path + ".tmp")
+            os.replace(path + ".tmp", path)
+        return True
+
+    def size(self):
+        """(entries, objects, bytes) held in the cache."""
+        entries = len(os.listdir(os.path.join(self.path, "entries"))) if os.path.isdir(
+            os.path.join(self.path, "entries")) else 0
+        objects, total = 0, 0
+        for root, _, names in os.walk(os.path.join(self.path, "objects")):
+            objects += len(names)
+            total += sum(os.path.getsize(os.path.join(root, n)) for n in names)
+        return entries, objects, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the stage artifact cache.")
+    parser.add_argument("--clear", action="store_true", help=f"delete {CACHE_DIR}")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print("🧹 Cleared", CACHE_DIR)
+        return
+    entries, objects, total = ArtifactCache().size()
+    print(f"🗄️ {CACHE_DIR}: {entries} stage entries, {objects} objects, {total / 2 ** 20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# bench_stages.py
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from make_synthetic_workbook import make_workbook
+from run_all import SCRIPT_DIR, STAGES, upstream_stages
+
+# Workbook scales as sheets x columns x years (dual-table sheets, series per table, years per series)
+DEFAULT_SCALES = ["5x6x5", "5x30x20", "10x60x40"]
+
+# Repo files the stages read besides the workbook and series CSV
+SUPPORT_FILES = ["manual_agg_ref.txt", "real_growth_map.txt"]
+
+RESULTS_PATH = "bench_results.csv"
+
+
+def scale_label(scale):
+    return "x".join(map(str, scale))
+
+
+def parse_scale(text):
+    """ "5x30x20" -> (sheets, cols, years)."""
+    try:
+        sheets, cols, years = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"scale '{text}' is not SHEETSxCOLSxYEARS") from None
+    return sheets, cols, years
+
+
+def run_timed(script, cwd, env):
+    """Run one stage script in its own process; return (seconds, peak RSS in MB, return code).
+
+    os.wait4 returns the resource usage of that child alone, so the peak RSS
+    is the stage's own and not the maximum over every stage run so far.
+    """
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, os.path.join(SCRIPT_DIR, script)], cwd=cwd, env=env,
+                                stdout=subprocess.DEVNULL, stderr=stderr)
+        _, status, usage = os.wait4(proc.pid, 0)
+        seconds = time.perf_counter() - start
+        proc.returncode = code = os.waitstatus_to_exitcode(status)
+        if code:
+            stderr.seek(0)
+            print(f"❌ {script} failed:\n{stderr.read().decode(errors='replace')}")
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    peak_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return seconds, peak_mb, code
+
+
+def bench_scale(scale, stages, repeat=1, keep=None, env=None):
+    """Generate one synthetic workbook and time every stage on it in declared order.
+
+    Each repeat starts from a fresh copy of the generated inputs, so every
+    stage sees the same cold state (no sheet cache). Returns one row per
+    stage with the best wall time of the repeats; cells_per_sec is the
+    workbook's data cells over that time, so stages compare across scales.
+    """
+    sheets, cols, years = scale
+    source = tempfile.mkdtemp(prefix="rsi_bench_")
+    try:
+        cells = make_workbook(source, cols, years, sheets)
+        for name in SUPPORT_FILES:
+            shutil.copy(os.path.join(SCRIPT_DIR, name), source)
+        os.makedirs(os.path.join(source, "cleansed"), exist_ok=True)
+
+        rows = {}
+        for attempt in range(repeat):
+            workdir = tempfile.mkdtemp(prefix="rsi_bench_run_")
+            shutil.copytree(source, workdir, dirs_exist_ok=True)
+            try:
+                for stage in stages:
+                    seconds, peak_mb, code = run_timed(stage["script"], workdir, env)
+                    best = rows.get(stage["script"])
+                    if best is None or seconds < best["seconds"]:
+                        rows[stage["script"]] = {
+                            "scale": scale_label(scale), "stage": stage["script"], "cells": cells,
+                            "seconds": seconds, "cells_per_sec": cells / seconds if seconds else None,
+                            "peak_rss_mb": peak_mb, "ok": code == 0,
+                        }
+                    if code:
+                        break
+            finally:
+                if keep and attempt == repeat - 1:
+                    shutil.copytree(workdir, os.path.join(keep, f"scale_{scale_label(scale)}"), dirs_exist_ok=True)
+                shutil.rmtree(workdir, ignore_errors=True)
+        return list(rows.values())
+    finally:
+        shutil.rmtree(source, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every run_all stage on synthetic workbooks of several sizes.")
+    parser.add_argument("--scales", nargs="+", type=parse_scale, default=[parse_scale(s) for s in DEFAULT_SCALES],
+                        help=f"SHEETSxCOLSxYEARS (default: {' '.join(DEFAULT_SCALES)})")
+    parser.add_argument("--stages", nargs="+", help="only report these scripts (their upstream stages still run)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per scale; the fastest time is reported")
+    parser.add_argument("--sheet-workers", type=int, help="RSI_SHEET_WORKERS for the per-sheet parsers")
+    parser.add_argument("--keep", help="copy the last run's working folder per scale here")
+    parser.add_argument("--out", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.sheet_workers is not None:
+        env["RSI_SHEET_WORKERS"] = str(args.sheet_workers)
+
+    stages = STAGES
+    if args.stages:
+        needed = {stage["script"] for script in args.stages for stage in upstream_stages(STAGES, script)}
+        stages = [stage for stage in STAGES if stage["script"] in needed]
+
+    results = []
+    for scale in args.scales:
+        print(f"📐 Scale {scale_label(scale)} (sheets x cols x years) ...")
+        results += bench_scale(scale, stages, args.repeat, args.keep, env)
+
+    report = pd.DataFrame(results)
+    if args.stages:
+        report = report[report["stage"].isin(args.stages)]
+    report.to_csv(args.out, index=False)
+
+    rows = [stage["script"] for stage in stages if stage["script"] in set(report["stage"])]
+    columns = [scale_label(scale) for scale in args.scales]
+    for title, column, digits in [("Throughput (cells/sec)", "cells_per_sec", 0), ("Peak RSS (MB)", "peak_rss_mb", 1)]:
+        table = report.pivot(index="stage", columns="scale", values=column).reindex(index=rows, columns=columns)
+        print(f"\n{title}:")
+        print(table.round(digits).to_string())
+    print("✅ Saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
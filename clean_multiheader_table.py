@@ -4,41 +4,10 @@ import pandas as pd
 import re
 import os
 from load_rsi_data_v2 import get_excel_file
-
-# Ensure cleansed directory exists
-os.makedirs("cleansed", exist_ok=True)
-
-# Load Excel file
-xls = pd.ExcelFile(get_excel_file())
-
-# Target sheets
-target_sheets = [s for s in xls.sheet_names if re.match(r'^Table [1-2] [MQA]$', s)]
-
-all_data = []
-agg_reference = {}
-
-# Helper to clean text and extract note
-
-def clean_text(val):
-    if pd.isna(val):
-        return '', ''
-    val_str = str(val)
-    match = re.search(r'\[(.*?)\]', val_str)
-    note = match.group(1).capitalize() if match else ''
-    cleaned = re.sub(r'\[.*?\]', '', val_str).strip()
-    return cleaned, note
-
-# Frequency detection
-
-def detect_frequency(date_str):
-    date_str = date_str.strip()
-    if re.match(r"^\d{4} [A-Za-z]{3}$", date_str):
-        return "monthly"
-    elif re.match(r"^\d{4} Q[1-4]$", date_str):
-        return "quarterly"
-    elif re.match(r"^\d{4}$", date_str):
-        return "annual"
-    return "unknown"
+from table_blocks import extract_block, concat_blocks, find_rows
+from sheet_pool import map_sheets, merge_first_seen
+from rsi_period import detect_frequency
+from footnotes import split_notes
 
 # Field labels to detect
 FIELD_LABELS = {
@@ -49,13 +18,17 @@ FIELD_LABELS = {
     'dataset_code': ['dataset identifier code']
 }
 
-# Process each sheet
-for sheet_name in target_sheets:
+def parse_sheet(sheet_name):
+    """Parse one sheet into (observations, agg_reference seen on this sheet)."""
+    xls = get_excel_file()
+    all_data = []
+    agg_reference = {}
+
     df_raw = xls.parse(sheet_name, header=None, dtype=str)
     if df_raw.empty:
-        continue
+        return concat_blocks(all_data), agg_reference
 
-    time_period_rows = df_raw[df_raw.apply(lambda row: row.astype(str).str.contains("Time Period", case=False).any(), axis=1)].index.tolist()
+    time_period_rows = find_rows(df_raw, "Time Period")
 
     for i, headers_start_idx in enumerate(time_period_rows):
         table_name_row = headers_start_idx - 1
@@ -73,8 +46,9 @@ for sheet_name in target_sheets:
                     field_row_map[field] = row_idx
 
         column_mappings = []
+        time_periods = split_notes(header_block.iloc[field_row_map['time_period_description']]) if 'time_period_description' in field_row_map else None
         for col in range(1, header_block.shape[1]):
-            time_period_desc, note_ref = clean_text(header_block.iloc[field_row_map.get('time_period_description', -1), col]) if 'time_period_description' in field_row_map else ('', '')
+            time_period_desc, note_ref = (time_periods["text"].iloc[col], time_periods["note_ref"].iloc[col]) if time_periods is not None else ('', '')
             sales_in_2022 = header_block.iloc[field_row_map['sales_in_2022'], col] if 'sales_in_2022' in field_row_map else ''
             agg_sic = header_block.iloc[field_row_map['agg_sic_code'], col] if 'agg_sic_code' in field_row_map else ''
             percentage_weight = header_block.iloc[field_row_map['percentage_weight'], col] if 'percentage_weight' in field_row_map else ''
@@ -101,34 +75,41 @@ for sheet_name in target_sheets:
         data_start_idx = headers_start_idx + len(field_row_map)
         df_data = df_raw.iloc[data_start_idx:next_block_start].reset_index(drop=True)
 
-        for _, row in df_data.iterrows():
-            date_val = row[0]
-            if pd.isna(date_val):
-                continue
-            frequency = detect_frequency(str(date_val).strip())
-
-            for mapping in column_mappings:
-                val = row[mapping["col_index"]]
-                if pd.isna(val):
-                    continue
-                try:
-                    all_data.append({
-                        "sheet_name": mapping["sheet_name"],
-                        "table_name": mapping["table_name"],
-                        "date": str(date_val).strip(),
-                        "frequency": frequency,
-                        "value": float(val),
-                        "agg_sic_code": mapping["agg_sic_code"],
-                        "dataset_code": mapping["dataset_code"]
-                    })
-                except ValueError:
-                    continue
-
-# Final output
-
-pd.DataFrame(all_data).to_csv("cleansed/cleaned_multiheader_table_data.csv", index=False)
-pd.DataFrame([{ "agg_sic_code": k, **v } for k, v in agg_reference.items()]).to_csv("cleansed/agg_reference_extended.csv", index=False)
-
-print("✅ Saved:")
-print(" - cleansed/cleaned_multiheader_table_data.csv")
-print(" - cleansed/agg_reference_extended.csv")
\ No newline at end of file
+        block = extract_block(df_data, column_mappings)
+        if not block.empty:
+            block["frequency"] = detect_frequency(block["date"])
+        all_data.append(block)
+
+    return concat_blocks(all_data), agg_reference
+
+def main():
+    # Ensure cleansed directory exists
+    os.makedirs("cleansed", exist_ok=True)
+
+    # Load Excel file
+    xls = get_excel_file()
+
+    # Target sheets
+    target_sheets = [s for s in xls.sheet_names if re.match(r'^Table [1-2] [MQA]$', s)]
+
+    # Parse sheets (in parallel with RSI_SHEET_WORKERS > 1), merged in workbook order
+    all_data = []
+    agg_reference = {}
+    for df_sheet, sheet_reference in map_sheets("clean_multiheader_table", "parse_sheet", target_sheets):
+        all_data.append(df_sheet)
+        merge_first_seen(agg_reference, sheet_reference)
+
+    # Final output
+
+    df_main = concat_blocks(all_data)
+    if not df_main.empty:
+        df_main = df_main[["sheet_name", "table_name", "date", "frequency", "value", "agg_sic_code", "dataset_code"]]
+    df_main.to_csv("cleansed/cleaned_multiheader_table_data.csv", index=False)
+    pd.DataFrame([{ "agg_sic_code": k, **v } for k, v in agg_reference.items()]).to_csv("cleansed/agg_reference_extended.csv", index=False)
+
+    print("✅ Saved:")
+    print(" - cleansed/cleaned_multiheader_table_data.csv")
+    print(" - cleansed/agg_reference_extended.csv")
+
+if __name__ == "__main__":
+    main()
@@ -4,49 +4,11 @@ import pandas as pd
 import re
 import os
 from load_rsi_data_v2 import get_excel_file
-
-# Ensure output folder exists
-os.makedirs("cleansed", exist_ok=True)
-
-# Load Excel file and reference from agg_reference_extended.csv
-xls = pd.ExcelFile(get_excel_file())
-df_agg_lookup = pd.read_csv("cleansed/agg_reference_extended.csv")
-
-# Build time_period_description lookup using agg_reference_extended.csv
-description_lookup = {}
-for _, row in df_agg_lookup.iterrows():
-    desc = str(row.get("time_period_description", '')).strip().lower()
-    if desc and desc not in description_lookup:
-        description_lookup[desc] = {
-            "agg_sic_code": str(row.get("agg_sic_code", '')).strip(),
-            "note_ref": str(row.get("note_ref", '')).strip()
-        }
-
-# Target only Table 3 and 4 sheets
-target_sheets = [s for s in xls.sheet_names if re.match(r'^Table [34] [MQA]$', s)]
-
-all_data = []
-agg_ref = {}
-unmatched_log = []
-
-def clean_text(val):
-    if pd.isna(val):
-        return '', ''
-    val_str = str(val)
-    match = re.search(r'\[(.*?)\]', val_str)
-    note = match.group(1).capitalize() if match else ''
-    cleaned = re.sub(r'\[.*?\]', '', val_str).strip()
-    return cleaned, note
-
-def detect_frequency(date_str):
-    date_str = date_str.strip()
-    if re.match(r"^\d{4} [A-Za-z]{3}$", date_str):
-        return "monthly"
-    elif re.match(r"^\d{4} Q[1-4]$", date_str):
-        return "quarterly"
-    elif re.match(r"^\d{4}$", date_str):
-        return "annual"
-    return "unknown"
+from table_blocks import extract_block, concat_blocks, find_rows
+from sheet_pool import map_sheets, merge_first_seen
+from rsi_period import detect_frequency
+from agg_resolver import AggResolver
+from footnotes import split_notes
 
 # Suffix mapping:
 suffix_map = {
@@ -55,12 +17,50 @@ suffix_map = {
     "small businesses": "-SB"
 }
 
-for sheet_name in target_sheets:
+# Fields copied from each column onto its observations
+BLOCK_COLS = ["col_index", "sheet_name", "table_name", "agg_sic_code", "dataset_code", "time_period_description"]
+
+# Per-column review log fields for unmatched and fuzzy-matched descriptions
+REVIEW_COLS = ["sheet_name", "table_name", "dataset_code", "time_period_description", "agg_sic_code",
+               "matched_description", "confidence"]
+
+def resolve_columns(columns, resolver):
+    """Resolve agg_sic_code for a table's columns in two batch calls.
+
+    The base description (business size suffix removed) is tried first and
+    gets the suffix tag appended; a column whose base does not resolve falls
+    back to its full description. Exact matches win over fuzzy ones.
+    """
+    base = resolver.resolve([c["base_key"] for c in columns])
+    full = resolver.resolve([c["time_period_description"] for c in columns])
+    for column, (_, b), (_, f) in zip(columns, base.iterrows(), full.iterrows()):
+        use_base = b.method == "exact" or (b.method and f.method != "exact" and b.confidence >= f.confidence)
+        match = b if use_base else f
+        if match.method:
+            column["agg_sic_code"] = match.agg_sic_code + (column["suffix_tag"] if use_base else "")
+            column["note_ref"] = match.note_ref
+        else:
+            column["agg_sic_code"] = ""
+            match = max((b, f), key=lambda m: m.confidence)
+        column["from_base"] = bool(use_base and match.method)
+        column["method"] = match.method
+        column["matched_description"] = match.matched_description
+        column["confidence"] = round(match.confidence, 3)
+    return columns
+
+def parse_sheet(sheet_name, resolver):
+    """Parse one sheet into (observations, agg_ref seen on this sheet, unmatched log, fuzzy match log)."""
+    xls = get_excel_file()
+    all_data = []
+    agg_ref = {}
+    unmatched_log = []
+    fuzzy_log = []
+
     df_raw = xls.parse(sheet_name, header=None, dtype=str)
     if df_raw.empty:
-        continue
+        return concat_blocks(all_data), agg_ref, unmatched_log, fuzzy_log
 
-    time_period_rows = df_raw[df_raw.apply(lambda row: row.astype(str).str.contains("Time Period", case=False).any(), axis=1)].index.tolist()
+    time_period_rows = find_rows(df_raw, "Time Period")
 
     for i, headers_start_idx in enumerate(time_period_rows):
         table_name_row = headers_start_idx - 1
@@ -72,7 +72,7 @@ for sheet_name in target_sheets:
         header_rows = header_block.iloc[:3]  # Max 3 rows
         df_data = header_block.iloc[3:].reset_index(drop=True)
 
-        time_period_header = header_rows.iloc[0]
+        time_periods = split_notes(header_rows.iloc[0])
         dataset_code_row = None
         sales_in_2022_row = None
 
@@ -84,9 +84,9 @@ for sheet_name in target_sheets:
             elif any("sales in 2022" in val for val in row_vals):
                 sales_in_2022_row = header_rows.iloc[row_idx]
 
+        column_mappings = []
         for col in range(1, header_rows.shape[1]):
-            raw_time_period = time_period_header[col]
-            cleaned_desc, note_ref = clean_text(raw_time_period)
+            cleaned_desc, note_ref = time_periods["text"].iloc[col], time_periods["note_ref"].iloc[col]
 
             # Split description into parts using commas. 
             # If there are multiple commas, join all except the last one as the base description.
@@ -98,61 +98,86 @@ for sheet_name in target_sheets:
                 suffix = ""
                 base_key = parts[0].lower()
 
-            suffix_tag = suffix_map.get(suffix, '')
-            base_lookup = description_lookup.get(base_key, {})
-            base_agg_code = base_lookup.get("agg_sic_code", '')
-            note_ref = base_lookup.get("note_ref", note_ref)
-            final_agg_code = f"{base_agg_code}{suffix_tag}" if base_agg_code else ''
-
-            dataset_code = dataset_code_row[col].strip() if dataset_code_row is not None else ''
-            sales_in_2022 = sales_in_2022_row[col].strip() if sales_in_2022_row is not None else ''
-
-            if not base_agg_code:
-                unmatched_log.append({
-                    "sheet_name": sheet_name,
-                    "table_name": table_name,
-                    "dataset_code": dataset_code,
-                    "time_period_description": cleaned_desc
-                })
-
-            if final_agg_code and final_agg_code not in agg_ref:
+            column_mappings.append({
+                "col_index": col,
+                "sheet_name": sheet_name,
+                "table_name": table_name,
+                "dataset_code": dataset_code_row[col].strip() if dataset_code_row is not None else '',
+                "time_period_description": cleaned_desc,
+                "base_key": base_key,
+                "suffix_tag": suffix_map.get(suffix, ''),
+                "note_ref": note_ref,
+                "sales_in_2022": sales_in_2022_row[col].strip() if sales_in_2022_row is not None else '',
+            })
+
+        for column in resolve_columns(column_mappings, resolver):
+            review = {key: column[key] for key in REVIEW_COLS}
+            if not column["agg_sic_code"]:
+                unmatched_log.append(review)
+            elif column["method"] == "fuzzy":
+                fuzzy_log.append(review)
+
+            final_agg_code = column["agg_sic_code"]
+            if column["from_base"] and final_agg_code not in agg_ref:
                 agg_ref[final_agg_code] = {
-                    "time_period_description": cleaned_desc,
-                    "note_ref": note_ref,
-                    "sales_in_2022": sales_in_2022
+                    "time_period_description": column["time_period_description"],
+                    "note_ref": column["note_ref"],
+                    "sales_in_2022": column["sales_in_2022"]
                 }
 
-            for _, row in df_data.iterrows():
-                date_val = row[0]
-                val = row[col]
-                if pd.isna(date_val) or pd.isna(val):
-                    continue
-
-                frequency = detect_frequency(str(date_val))
-
-                try:
-                    all_data.append({
-                        "sheet_name": sheet_name,
-                        "table_name": table_name,
-                        "date": str(date_val).strip(),
-                        "frequency": frequency,
-                        "value": float(val),
-                        "agg_sic_code": final_agg_code,
-                        "dataset_code": dataset_code,
-                        "time_period_description": cleaned_desc  
-                    })
-                except ValueError:
-                    continue
-
-# Output the CSV files, including time_period_description in the main data CSV
-pd.DataFrame(all_data).to_csv("cleansed/cleaned_table_3_4_data_v3.csv", index=False)
-pd.DataFrame([{"agg_sic_code": k, **v} for k, v in agg_ref.items()]).to_csv("cleansed/agg_reference_table_3_4.csv", index=False)
-pd.DataFrame(unmatched_log).to_csv("cleansed/unmatched_table_3_4_log.csv", index=False)
-
-output_file = "cleansed/cleaned_table_3_4_data_v3.csv"
-print("Output written to:", output_file)
-
-print("✅ Saved:")
-print(" - cleansed/cleaned_table_3_4_data_v3.csv")
-print(" - cleansed/agg_reference_table_3_4.csv")
-print(" - cleansed/unmatched_table_3_4_log.csv")
\ No newline at end of file
+        # Long format: one row per numeric cell, column by column
+        block = extract_block(df_data, [{key: column[key] for key in BLOCK_COLS} for column in column_mappings],
+                              order="column")
+        if not block.empty:
+            block["frequency"] = detect_frequency(block["date"])
+        all_data.append(block)
+
+    return concat_blocks(all_data), agg_ref, unmatched_log, fuzzy_log
+
+def main():
+    # Ensure output folder exists
+    os.makedirs("cleansed", exist_ok=True)
+
+    # Load Excel file and the agg_sic_code resolver (agg_reference_extended.csv,
+    # agg_reference.csv, then manual_agg_ref.txt)
+    xls = get_excel_file()
+    resolver = AggResolver.from_files()
+
+    # Target only Table 3 and 4 sheets
+    target_sheets = [s for s in xls.sheet_names if re.match(r'^Table [34] [MQA]$', s)]
+
+    # Parse sheets (in parallel with RSI_SHEET_WORKERS > 1), merged in workbook order
+    all_data = []
+    agg_ref = {}
+    unmatched_log = []
+    fuzzy_log = []
+    results = map_sheets("clean_table_3_4_v3", "parse_sheet", target_sheets, resolver)
+    for df_sheet, sheet_ref, sheet_unmatched, sheet_fuzzy in results:
+        all_data.append(df_sheet)
+        merge_first_seen(agg_ref, sheet_ref)
+        unmatched_log.extend(sheet_unmatched)
+        fuzzy_log.extend(sheet_fuzzy)
+
+    # Output the CSV files, including time_period_description in the main data CSV
+    df_main = concat_blocks(all_data)
+    if not df_main.empty:
+        df_main = df_main[["sheet_name", "table_name", "date", "frequency", "value", "agg_sic_code", "dataset_code",
+                           "time_period_description"]]
+    df_main.to_csv("cleansed/cleaned_table_3_4_data_v3.csv", index=False)
+    pd.DataFrame([{"agg_sic_code": k, **v} for k, v in agg_ref.items()]).to_csv("cleansed/agg_reference_table_3_4.csv", index=False)
+    pd.DataFrame(unmatched_log, columns=REVIEW_COLS).to_csv("cleansed/unmatched_table_3_4_log.csv", index=False)
+    pd.DataFrame(fuzzy_log, columns=REVIEW_COLS).to_csv("cleansed/fuzzy_matches_table_3_4_log.csv", index=False)
+
+    output_file = "cleansed/cleaned_table_3_4_data_v3.csv"
+    print("Output written to:", output_file)
+
+    print("✅ Saved:")
+    print(" - cleansed/cleaned_table_3_4_data_v3.csv")
+    print(" - cleansed/agg_reference_table_3_4.csv")
+    print(" - cleansed/unmatched_table_3_4_log.csv")
+    print(" - cleansed/fuzzy_matches_table_3_4_log.csv")
+    if unmatched_log or fuzzy_log:
+        print(f"🔎 {len(unmatched_log)} unmatched and {len(fuzzy_log)} fuzzy-matched column(s) to review")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# deflate.py
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from rsi_period import parse_period
+from series_store import SeriesStore, normalise_key
+
+MERGED_CSV = "cleansed/rsi_data_merged.csv"
+OUTPUT_PATH = "cleansed/deflated.csv"
+
+# RPI all items long-run series (Jan 1974=100), loaded by prep_rpi_data.py
+RPI_SHEET = "CDKO"
+DEFAULT_BASE = "1974 JAN"
+
+SERIES_KEY = ["sheet_name", "table_code", "dataset_code", "agg_sic_code", "frequency"]
+
+# Months covered by one period of each frequency (period_key is the last month)
+PERIOD_MONTHS = {"monthly": 1, "quarterly": 3, "annual": 12}
+FREQUENCY_CODES = {"monthly": 1, "quarterly": 2, "annual": 3}
+
+
+def _lookup_keys(frequency, period_key):
+    """One int64 per (frequency, period_key) so RPI lookups are a single searchsorted."""
+    code = pd.Series(frequency, dtype=object).astype(str).map(FREQUENCY_CODES).fillna(0).to_numpy(dtype=np.int64)
+    key = pd.Series(period_key).astype("Float64").fillna(-1).to_numpy(dtype=np.int64)
+    return code * 1_000_000 + key
+
+
+def _month_count(period_key):
+    """Months since year 0 for yyyymm keys, so spans can be compared with subtraction."""
+    return period_key // 100 * 12 + period_key % 100 - 1
+
+
+def rpi_table(df, sheet=RPI_SHEET):
+    """RPI by (frequency, period_key) from the merged data.
+
+    Published monthly and annual values are used as they are. Quarterly values,
+    and any annual values that are not published, are averages of the monthly
+    index over complete quarters/years. Returns frequency, period_key, rpi and
+    derived (True for averaged values), sorted for lookup.
+    """
+    rpi = df[normalise_key(df["sheet_name"]).to_numpy() == sheet.upper()].dropna(subset=["value", "period_key"])
+    rpi = pd.DataFrame({"frequency": rpi["frequency"].astype(str).to_numpy(),
+                        "period_key": rpi["period_key"].to_numpy(dtype=np.int64),
+                        "rpi": rpi["value"].to_numpy(dtype=float)})
+    published = rpi[rpi["frequency"].isin(["monthly", "annual"])].assign(derived=False)
+
+    monthly = published[published["frequency"] == "monthly"]
+    key = monthly["period_key"].to_numpy()
+    derived = []
+    for frequency, period_key in [("quarterly", key // 100 * 100 + ((key % 100 - 1) // 3 + 1) * 3),
+                                  ("annual", key // 100 * 100 + 12)]:
+        averaged = monthly.groupby(period_key)["rpi"].agg(["mean", "size"])
+        averaged = averaged[averaged["size"] == PERIOD_MONTHS[frequency]]
+        derived.append(pd.DataFrame({"frequency": frequency, "period_key": averaged.index.to_numpy(dtype=np.int64),
+                                     "rpi": averaged["mean"].to_numpy(), "derived": True}))
+
+    table = pd.concat([published] + derived, ignore_index=True)
+    table = table.drop_duplicates(["frequency", "period_key"], keep="first")
+    table["lookup_key"] = _lookup_keys(table["frequency"], table["period_key"])
+    table = table.sort_values("lookup_key", kind="stable").reset_index(drop=True)
+    if table["lookup_key"].duplicated().any():
+        raise ValueError(f"Duplicate {sheet} observations in the merged data")
+    return table
+
+
+def lookup_rpi(table, frequency, period_key):
+    """RPI for aligned arrays of frequency and period_key (NaN where there is none)."""
+    wanted = _lookup_keys(frequency, period_key)
+    keys = table["lookup_key"].to_numpy()
+    if not len(keys):
+        return np.full(len(wanted), np.nan)
+    pos = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    return np.where(keys[pos] == wanted, table["rpi"].to_numpy()[pos], np.nan)
+
+
+def base_period(base):
+    """(frequency, period_key) of a base period label such as "2019", "2019 Q4" or "1974 JAN"."""
+    frequency, _, _, _, _, period_key = parse_period(str(base))
+    if period_key is None:
+        raise ValueError(f"Unrecognised base period '{base}'")
+    return frequency, period_key
+
+
+def deflate(obs, table, base=DEFAULT_BASE):
+    """Express every observation in constant prices of the base period.
+
+    obs holds any selection of series from the merged data (frequency,
+    period_key and value columns). Each row is matched with the RPI of its own
+    frequency and period, so annual series use annual RPI and monthly series
+    monthly RPI. Adds rpi, deflator (RPI rebased to 100 in the base period) and
+    real_value = value * 100 / deflator.
+    """
+    base_rpi = lookup_rpi(table, *[[part] for part in base_period(base)])[0]
+    if np.isnan(base_rpi):
+        raise ValueError(f"No {RPI_SHEET} value for base period '{base}'")
+    rpi = lookup_rpi(table, obs["frequency"], obs["period_key"])
+    out = obs.copy()
+    out["rpi"] = rpi
+    out["deflator"] = 100.0 * rpi / base_rpi
+    out["real_value"] = out["value"].to_numpy(dtype=float) * base_rpi / rpi
+    return out
+
+
+def rebase(obs, base, column="real_value", key=SERIES_KEY):
+    """Rescale each series so its average over the base period is 100.
+
+    Only observations lying wholly inside the base period count, so a base of
+    "2019" averages the twelve months of a monthly series, the four quarters of
+    a quarterly one and the 2019 value of an annual one. Series with no
+    observation in the base period get NaN.
+    """
+    frequency, base_key = base_period(base)
+    base_start = _month_count(base_key) - PERIOD_MONTHS[frequency] + 1
+    period_key = obs["period_key"].astype("Float64").fillna(-1).to_numpy(dtype=np.int64)
+    months = obs["frequency"].astype(str).map(PERIOD_MONTHS).fillna(0).to_numpy(dtype=np.int64)
+    end = _month_count(period_key)
+    inside = (period_key >= 0) & (end - months + 1 >= base_start) & (end <= _month_count(base_key))
+
+    groups = obs.groupby(key, dropna=False, observed=True, sort=False).ngroup().to_numpy()
+    values = obs[column].to_numpy(dtype=float)
+    level = pd.Series(np.where(inside, values, np.nan)).groupby(groups).transform("mean").to_numpy()
+    out = obs.copy()
+    out[f"{column}_rebased"] = 100.0 * values / level
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Deflate merged RSI series to constant prices with {RPI_SHEET} RPI.")
+    parser.add_argument("--base", default=DEFAULT_BASE, help="base period for constant prices, e.g. 2019, 2019 Q4, 2019 JAN")
+    parser.add_argument("--rebase", help="also rescale each real series to 100 over this period")
+    parser.add_argument("--dataset-code")
+    parser.add_argument("--agg-sic-code")
+    parser.add_argument("--sheet-name")
+    parser.add_argument("--table-code")
+    parser.add_argument("--frequency")
+    parser.add_argument("--out", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    store = SeriesStore.from_csv(MERGED_CSV)
+    table = rpi_table(store.data)
+    obs = store.get_series(args.dataset_code, args.agg_sic_code, args.sheet_name, args.table_code, args.frequency)
+    obs = obs[normalise_key(obs["sheet_name"]).to_numpy() != RPI_SHEET]
+
+    out = deflate(obs, table, args.base)
+    if args.rebase:
+        out = rebase(out, args.rebase)
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    out.to_csv(args.out, index=False)
+    matched = int(out["rpi"].notna().sum())
+    print(f"💷 {matched} of {len(out)} values deflated to {args.base} prices "
+          f"({out.groupby(SERIES_KEY, dropna=False, observed=True).ngroups} series)")
+    print("✅ Saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# export_sqlite.py
+
+import argparse
+import os
+import sqlite3
+import time
+from itertools import islice
+
+import pandas as pd
+
+from rsi_schema import read_merged_csv
+
+DB_PATH = "cleansed/rsi.sqlite"
+BATCH_SIZE = 10_000
+
+# One entry per exported output: CSV, SQLite table, identity columns (the
+# upsert key; missing key parts are stored as '' so they still conflict) and
+# covering indexes (value as the last column, so point queries never touch
+# the table itself). The observation key is the same as ingest.DIFF_KEY.
+EXPORTS = [
+    {"csv": "cleansed/rsi_data_merged.csv", "table": "observation",
+     "key": ["sheet_name", "dataset_code", "agg_sic_code", "frequency", "period_key"],
+     "indexes": [["dataset_code", "frequency", "period_key", "value"],
+                 ["agg_sic_code", "frequency", "period_key", "value"]]},
+    {"csv": "cleansed/agg_reference_merged.csv", "table": "agg_reference", "key": ["agg_sic_code"]},
+    {"csv": "cleansed/clean_table_name.csv", "table": "table_name", "key": ["table_name"]},
+    {"csv": "cleansed/table_5_series.csv", "table": "table_5_series", "key": ["series_id"],
+     "indexes": [["dataset_code", "series_id"]]},
+    {"csv": "cleansed/table_5_observations.csv", "table": "table_5_observation", "key": ["series_id", "period_key"]},
+    {"csv": "cleansed/cleaned_table_6_data.csv", "table": "table_6", "key": ["Business type", "column_type"]},
+    {"csv": "cleansed/cleaned_notes.csv", "table": "note", "key": ["note_number"]},
+    {"csv": "cleansed/cleaned_contents.csv", "table": "contents", "key": ["worksheet_number"]},
+]
+
+# Tables of outputs that are no longer produced (the wide Table 5 is now table_5_series + table_5_observation)
+RETIRED_TABLES = ["table_5"]
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_type(dtype):
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def read_export(spec):
+    """Read one output CSV typed for SQLite; key parts never null, one row per key (last wins)."""
+    if spec["table"] == "observation":
+        df = read_merged_csv(spec["csv"])
+    else:
+        df = pd.read_csv(spec["csv"], dtype={col: str for col in spec["key"]})
+    for col in spec["key"]:
+        if sql_type(df[col].dtype) == "TEXT":
+            df[col] = df[col].astype(object).fillna("")
+    duplicates = df.duplicated(spec["key"], keep="last")
+    if duplicates.any():
+        print(f"⚠️ {spec['table']}: {duplicates.sum()} rows repeat an earlier key, kept the last")
+        df = df[~duplicates]
+    return df
+
+
+def create_table(conn, spec, df):
+    """Create the table (primary key = identity columns) and its covering indexes if missing.
+
+    A table whose columns or key no longer match the CSV and spec is dropped and rebuilt.
+    """
+    table = quote(spec["table"])
+    info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    existing = [row[1] for row in info]
+    existing_key = [row[1] for row in sorted((row for row in info if row[5]), key=lambda row: row[5])]
+    if existing and (existing != list(df.columns) or existing_key != spec["key"]):
+        print(f"⚠️ {spec['table']}: columns or key changed, rebuilding the table")
+        conn.execute(f"DROP TABLE {table}")
+    columns = ", ".join(f"{quote(col)} {sql_type(df[col].dtype)}" for col in df.columns)
+    key = ", ".join(map(quote, spec["key"]))
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns}, PRIMARY KEY ({key}))")
+    for cols in spec.get("indexes", []):
+        name = quote(f"ix_{spec['table']}_{cols[0]}")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(map(quote, cols))})")
+
+
+def _rows(df):
+    """Row tuples with missing values as None and numpy scalars as Python ones."""
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def upsert(conn, spec, df, batch_size=BATCH_SIZE):
+    """Make the table hold exactly df's rows, writing only rows that are new or changed.
+
+    The frame is bulk-loaded into a temp staging table with executemany in
+    batches, then merged with one INSERT ... ON CONFLICT DO UPDATE whose WHERE
+    skips rows whose values are unchanged, and rows no longer present are
+    deleted. Returns (inserted, updated, deleted).
+    """
+    table = quote(spec["table"])
+    names = list(df.columns)
+    cols = ", ".join(map(quote, names))
+    key = ", ".join(map(quote, spec["key"]))
+    values = [col for col in names if col not in spec["key"]]
+
+    conn.execute("DROP TABLE IF EXISTS temp.staging")
+    conn.execute(f"CREATE TEMP TABLE staging AS SELECT {cols} FROM {table} WHERE 0")
+    insert = f"INSERT INTO temp.staging ({cols}) VALUES ({', '.join('?' * len(names))})"
+    rows = _rows(df)
+    while batch := list(islice(rows, batch_size)):
+        conn.executemany(insert, batch)
+
+    before = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+    merge = f"INSERT INTO {table} ({cols}) SELECT {cols} FROM temp.staging WHERE true ON CONFLICT ({key}) DO "
+    if values:
+        merge += ("UPDATE SET " + ", ".join(f"{quote(c)} = excluded.{quote(c)}" for c in values)
+                  + " WHERE " + " OR ".join(f"{table}.{quote(c)} IS NOT excluded.{quote(c)}" for c in values))
+    else:
+        merge += "NOTHING"
+    written = conn.execute(merge).rowcount
+    after = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+    match = " AND ".join(f"s.{quote(c)} IS {table}.{quote(c)}" for c in spec["key"])
+    deleted = conn.execute(f"DELETE FROM {table} WHERE NOT EXISTS (SELECT 1 FROM temp.staging s WHERE {match})"
+                           ).rowcount
+    conn.execute("DROP TABLE temp.staging")
+    inserted = after - before
+    return inserted, written - inserted, deleted
+
+
+def export(db_path=DB_PATH, exports=EXPORTS):
+    """Upsert every existing output CSV into db_path in one transaction; returns {table: counts}."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    counts = {}
+    try:
+        with conn:
+            for table in RETIRED_TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+            for spec in exports:
+                if not os.path.exists(spec["csv"]):
+                    print(f"⚠️ {spec['csv']} not found, {spec['table']} left as it is")
+                    continue
+                df = read_export(spec)
+                create_table(conn, spec, df)
+                counts[spec["table"]] = upsert(conn, spec, df)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return counts
+
+
+def read_series(conn, dataset_code, frequency=None, agg_sic_code=None):
+    """Observations of one dataset_code (or, with dataset_code=None, one agg_sic_code) via the covering indexes."""
+    where, params = [], []
+    for col, value in [("dataset_code", dataset_code), ("agg_sic_code", agg_sic_code), ("frequency", frequency)]:
+        if value is not None:
+            where.append(f"{col} = ?")
+            params.append(value)
+    sql = "SELECT frequency, period_key, value FROM observation"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return pd.read_sql_query(sql + " ORDER BY frequency, period_key", conn, params=params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upsert the cleansed outputs into a SQLite database.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--series", metavar="DATASET_CODE", help="only query this dataset_code from the database")
+    parser.add_argument("--frequency")
+    args = parser.parse_args()
+
+    if args.series:
+        conn = sqlite3.connect(args.db)
+        start = time.perf_counter()
+        series = read_series(conn, args.series.upper(), args.frequency)
+        elapsed = (time.perf_counter() - start) * 1000
+        conn.close()
+        print(series.to_string(index=False))
+        print(f"🔎 {len(series)} rows in {elapsed:.1f} ms")
+        return
+
+    for table, (inserted, updated, deleted) in export(args.db).items():
+        print(f"🗃️ {table}: {inserted:,} inserted, {updated:,} updated, {deleted:,} deleted")
+    print("✅ Saved SQLite database to:", args.db)
+
+
+if __name__ == "__main__":
+    main()
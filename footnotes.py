@@ -0,0 +1,44 @@
+# footnotes.py
+
+import numpy as np
+import pandas as pd
+
+# Workbook cells carry footnote markers in square brackets, e.g.
+# "All retailing [note1]" or "[c]" for a confidential value
+MARKER_PATTERN = r"\[(.*?)\]"
+NOTE_NUMBER_PATTERN = r"(?i)^note\s*(\d+)$"
+CONFIDENTIAL = "Confidential"
+
+
+def normalise_note(notes):
+    """Normalised note codes for a column: noteN -> "Note N", c -> "Confidential", others unchanged.
+
+    Missing values stay missing (NaN, object dtype).
+    """
+    notes = pd.Series(notes, dtype="string").str.strip()
+    notes = notes.str.replace(NOTE_NUMBER_PATTERN, r"Note \1", regex=True)
+    notes = notes.mask(notes.str.lower().eq("c").fillna(False).astype(bool), CONFIDENTIAL)
+    return notes.astype(object).where(notes.notna(), np.nan)
+
+
+def split_notes(values, numeric=False):
+    """Strip footnote markers from a whole column at once.
+
+    Returns a frame on the index of values with "text" (the cell without
+    any [..] markers, stripped; "" for missing cells), "note_ref" (the first
+    marker, capitalised and normalised by normalise_note; "" if none) and
+    "has_note" (True where a marker was found). With numeric=True "text" is
+    replaced by "value", the cleaned cell as a float (NaN if not a number).
+    """
+    values = pd.Series(values, dtype="string")
+    raw = values.str.extract(MARKER_PATTERN, expand=False)
+    text = values.str.replace(MARKER_PATTERN, "", regex=True).str.strip()
+    result = pd.DataFrame({
+        "text": text.fillna("").astype(object),
+        "note_ref": normalise_note(raw.str.capitalize()).fillna("").astype(object),
+        "has_note": raw.notna().to_numpy(dtype=bool),
+    }, index=values.index)
+    if numeric:
+        result.insert(0, "value", pd.to_numeric(text, errors="coerce").astype(float))
+        result = result.drop(columns="text")
+    return result
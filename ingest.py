@@ -0,0 +1,228 @@
+# ingest.py
+
+import argparse
+import filecmp
+import os
+import shutil
+
+import pandas as pd
+
+from anomaly import update_incremental
+from load_rsi_data_v2 import EXCEL_PATH, series_release_date
+from rsi_parquet import MERGED_CSV, MERGED_DATASET, write_partitions
+from rsi_schema import read_merged_csv
+from run_all import SCRIPT_DIR, STAGES, run_pipeline, upstream_stages
+from vintage_store import VintageStore
+
+INGEST_DIR = ".rsi_cache/ingest"
+CHANGES_DIR = "cleansed/changes"
+
+# One observation per key in rsi_data_merged. table_code is left out: it is
+# the table name's initials (table_name_clean.create_table_code), so a
+# reworded table name changes it, while dataset_code already identifies the
+# series within a sheet
+DIFF_KEY = ["sheet_name", "dataset_code", "agg_sic_code", "frequency", "period_key"]
+
+# Last stage that shapes rsi_data_merged; only it and its upstream stages run
+MERGED_STAGE = "table_name_clean.py"
+
+
+def stage_release(workbook, series_csv, workspace):
+    """Lay out a release in a fresh workspace the pipeline can run in."""
+    shutil.rmtree(workspace, ignore_errors=True)
+    os.makedirs(os.path.join(workspace, "data"))
+    os.makedirs(os.path.join(workspace, "cleansed"))
+    shutil.copy2(workbook, os.path.join(workspace, "data", "mainreferencetables.xlsx"))
+    shutil.copy2(series_csv, os.path.join(workspace, "data", os.path.basename(series_csv)))
+    shutil.copy2(os.path.join(SCRIPT_DIR, "manual_agg_ref.txt"), workspace)
+
+
+def build_release(workspace, workers=None):
+    """Run the stages behind rsi_data_merged inside the workspace."""
+    cwd = os.getcwd()
+    os.chdir(workspace)
+    try:
+        run_pipeline(upstream_stages(STAGES, MERGED_STAGE), workers=workers, cache=None)
+    finally:
+        os.chdir(cwd)
+
+
+def diff_releases(old, new, key=DIFF_KEY):
+    """Return the inserted, revised and deleted observations between two merged frames.
+
+    Result columns: change_type, the key columns, date, old_value and value.
+    """
+    def prepare(df):
+        df = df[key + ["date", "value"]].copy()
+        for col in key + ["date"]:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object)
+        return df
+
+    both = prepare(old).merge(prepare(new), on=key, how="outer", suffixes=("_old", ""), indicator=True)
+    both["date"] = both["date"].fillna(both["date_old"])
+    changed_value = (both["value_old"] != both["value"]) & ~(both["value_old"].isna() & both["value"].isna())
+
+    change_type = pd.Series("", index=both.index)
+    change_type[both["_merge"] == "right_only"] = "inserted"
+    change_type[both["_merge"] == "left_only"] = "deleted"
+    change_type[(both["_merge"] == "both") & changed_value] = "revised"
+    both["change_type"] = change_type
+
+    changes = both[both["change_type"] != ""].rename(columns={"value_old": "old_value"})
+    return changes[["change_type"] + key + ["date", "old_value", "value"]].reset_index(drop=True)
+
+
+def summarise_changes(changes):
+    """Per-sheet counts of inserted/revised/deleted observations."""
+    summary = changes.groupby(["sheet_name", "change_type"]).size().unstack(fill_value=0)
+    return summary.reindex(columns=["inserted", "revised", "deleted"], fill_value=0).reset_index()
+
+
+def _replace_file(src, dst):
+    """Copy src over dst via a temp file so readers never see a half-written file."""
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    shutil.copy2(src, dst + ".tmp")
+    os.replace(dst + ".tmp", dst)
+
+
+def apply_release(workspace, new, changes):
+    """Publish the release: the CSV outputs whose content changed, and only the touched Parquet partitions.
+
+    Returns (replaced CSV names, touched partitions).
+    """
+    replaced = []
+    for name in sorted(os.listdir(os.path.join(workspace, "cleansed"))):
+        src = os.path.join(workspace, "cleansed", name)
+        dst = os.path.join("cleansed", name)
+        if not (name.endswith(".csv") and os.path.isfile(src)):
+            continue
+        if os.path.exists(dst) and filecmp.cmp(src, dst, shallow=False):
+            continue
+        _replace_file(src, dst)
+        replaced.append(name)
+
+    touched = set(changes[["sheet_name", "frequency"]].itertuples(index=False, name=None))
+    if touched:
+        write_partitions(new, touched, MERGED_DATASET)
+    return replaced, touched
+
+
+def promote_inputs(workbook, series_csv):
+    """Make the release's workbook and series CSV the pipeline's inputs in data/.
+
+    Without this the next run_all.py would re-parse the previous workbook and
+    undo the ingested release.
+    """
+    _replace_file(workbook, EXCEL_PATH)
+    _replace_file(series_csv, os.path.join(os.path.dirname(EXCEL_PATH), os.path.basename(series_csv)))
+
+
+def record_vintage(release, old, new, changes, replace=False, baseline=None):
+    """Add the release to the vintage store, recording the previous store as baseline first if needed.
+
+    baseline is the release date of the previous store (its series CSV in
+    data/, read before the new release is promoted). With replace=True an
+    already recorded release is rebuilt as the delta between the vintage
+    before it and new.
+    """
+    store = VintageStore()
+    if release in store.release_dates():
+        if not replace:
+            raise ValueError(f"Vintage {release} is already recorded; use --replace to rebuild it")
+        earlier = [d for d in store.release_dates() if d < release]
+        previous = store.as_of(earlier[-1]) if earlier else new.iloc[0:0]
+        changes = diff_releases(previous, new)
+        print(f"🕰️ Rebuilt vintage {release} against {earlier[-1] if earlier else 'an empty store'}")
+    elif not len(store) and not old.empty:
+        if baseline and baseline < release:
+            store.add_snapshot(baseline, old)
+            print(f"🕰️ Recorded the previous store as baseline vintage {baseline}")
+        else:
+            print("⚠️ No baseline vintage for the previous store; run vintage_store.py init before ingesting")
+    store.add_release(release, changes, replace=replace)
+    print(f"🕰️ Recorded vintage {release} ({len(changes)} changes) in {store.path}")
+
+
+def ingest(workbook, series_csv, workers=None, dry_run=False, keep_workspace=False, replace=False):
+    """Parse a new release and apply only its changes to the merged store.
+
+    A release already in the vintage store is only recorded again with
+    replace=True; re-ingesting it without changes leaves its vintage alone.
+    """
+    release = series_release_date(series_csv)
+    # Release date of the store being replaced, read before data/ is promoted
+    try:
+        baseline = series_release_date()
+    except FileNotFoundError:
+        baseline = None
+    label = release.isoformat() if release else os.path.splitext(os.path.basename(series_csv))[0]
+    workspace = os.path.join(INGEST_DIR, label)
+
+    print(f"📥 Ingesting release {label} from {workbook} and {series_csv}")
+    stage_release(workbook, series_csv, workspace)
+    build_release(workspace, workers=workers)
+
+    new = read_merged_csv(os.path.join(workspace, MERGED_CSV))
+    if os.path.exists(MERGED_CSV):
+        old = read_merged_csv(MERGED_CSV)
+    else:
+        old = new.iloc[0:0]
+    changes = diff_releases(old, new)
+    summary = summarise_changes(changes)
+    if (release and not dry_run and not changes.empty and not replace
+            and release in VintageStore().release_dates()):
+        raise ValueError(f"Vintage {release} is already recorded; use --replace to rebuild it")
+
+    print(f"🔍 {len(changes)} changed observations out of {len(new)}:")
+    print(summary.to_string(index=False) if not summary.empty else " - none")
+
+    # A re-ingest without changes must not overwrite the change files of the run that had them
+    if not changes.empty:
+        os.makedirs(CHANGES_DIR, exist_ok=True)
+        changes_path = os.path.join(CHANGES_DIR, f"changes_{label}.csv")
+        summary_path = os.path.join(CHANGES_DIR, f"changes_summary_{label}.csv")
+        changes.to_csv(changes_path, index=False)
+        summary.to_csv(summary_path, index=False)
+        print("✅ Saved:", changes_path, "and", summary_path)
+
+    if dry_run:
+        print("Dry run, the merged store was not changed.")
+    else:
+        replaced, touched = apply_release(workspace, new, changes)
+        print(f"🗂️ Replaced {len(replaced)} changed output file(s) and rewrote {len(touched)} Parquet "
+              f"partition(s) under {MERGED_DATASET}")
+        if changes.empty:
+            print("Nothing to apply, the merged store is up to date.")
+        else:
+            update_incremental(new)
+        promote_inputs(workbook, series_csv)
+        print("📦 Promoted the release's workbook and series CSV into", os.path.dirname(EXCEL_PATH))
+
+    if release and not dry_run and (replace or not changes.empty):
+        record_vintage(release, old, new, changes, replace=replace, baseline=baseline)
+
+    if not keep_workspace:
+        shutil.rmtree(workspace, ignore_errors=True)
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a new RSI release into the merged store.")
+    parser.add_argument("workbook", help="the release's mainreferencetables.xlsx")
+    parser.add_argument("series_csv", help="the release's series-DDMMYY.csv")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="number of pipeline stages allowed to run at the same time")
+    parser.add_argument("--dry-run", action="store_true", help="write the change files only")
+    parser.add_argument("--keep-workspace", action="store_true",
+                        help=f"keep the parsed release under {INGEST_DIR}")
+    parser.add_argument("--replace", action="store_true",
+                        help="rebuild the vintage of a release that is already recorded")
+    args = parser.parse_args()
+
+    ingest(args.workbook, args.series_csv, workers=args.workers, dry_run=args.dry_run,
+           keep_workspace=args.keep_workspace, replace=args.replace)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,223 @@
 # load_rsi_data.py
 
-import pandas as pd
+import csv
+import glob
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
 
-def get_excel_file():
-    """Load the main Excel workbook."""
-    excel_path = 'data/mainreferencetables.xlsx'
-    return pd.ExcelFile(excel_path)
+# numpy, pandas and xlsx_stream are imported where they are used, so the
+# sheet-cache and series CSV helpers load without them (rsi.py sheets/status)
+
+EXCEL_PATH = 'data/mainreferencetables.xlsx'
+# ONS series CSVs are named series-DDMMYY.csv; the newest one is used
+# unless RSI_SERIES_CSV names a file explicitly
+SERIES_CSV_GLOB = 'data/series-*.csv'
+
+# Decoded sheet grids live here, one folder per workbook content hash
+SHEET_CACHE_DIR = '.rsi_cache/sheets'
+SHEET_CACHE_VERSION = 1
+
+# Workbook reader: "stream" (xlsx_stream.StreamingWorkbook) or "openpyxl" (pd.ExcelFile)
+XLSX_BACKEND = os.environ.get('RSI_XLSX_BACKEND', 'stream')
+
+_workbooks = {}
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sheet_cache_path(workbook_hash, cache_dir=SHEET_CACHE_DIR, backend=XLSX_BACKEND):
+    """Folder holding the decoded sheets of the workbook with this sha256."""
+    return os.path.join(cache_dir, f"v{SHEET_CACHE_VERSION}-{backend}-{workbook_hash[:16]}")
+
+
+def cached_sheet_names(excel_path=EXCEL_PATH, cache_dir=SHEET_CACHE_DIR, backend=XLSX_BACKEND):
+    """Sheet names from the sheet cache manifest without opening the workbook, or None if not cached yet."""
+    manifest = os.path.join(sheet_cache_path(file_hash(excel_path), cache_dir, backend), 'manifest.json')
+    if not os.path.exists(manifest):
+        return None
+    with open(manifest, encoding='utf-8') as fh:
+        return json.load(fh)['sheet_names']
+
+
+class CachedWorkbook:
+    """Raw (header=None, dtype=str) sheet grids of a workbook, decoded once.
+
+    The first run parses every sheet in a single pass and stores each grid as
+    a .npz file under SHEET_CACHE_DIR/v<version>-<backend>-<workbook sha256>/. Later runs, and every
+    other stage, load the grid straight from there instead of re-reading the
+    workbook XML. A new workbook has a new hash and so gets a fresh cache.
+    """
+
+    def __init__(self, excel_path=EXCEL_PATH, cache_dir=SHEET_CACHE_DIR, backend=XLSX_BACKEND):
+        self.excel_path = excel_path
+        self.backend = backend
+        self.workbook_hash = file_hash(excel_path)
+        self.cache_path = sheet_cache_path(self.workbook_hash, cache_dir, backend)
+        if not os.path.exists(os.path.join(self.cache_path, 'manifest.json')):
+            self._build_cache()
+        with open(os.path.join(self.cache_path, 'manifest.json'), encoding='utf-8') as fh:
+            self.sheet_names = json.load(fh)['sheet_names']
+        self._grids = {}
+
+    def _build_cache(self):
+        """Decode every sheet once and write the grids to the cache folder."""
+        # Write into a private folder and rename it into place, so stages
+        # running at the same time never see a half-written cache
+        tmp_path = f"{self.cache_path}.tmp-{os.getpid()}"
+        os.makedirs(tmp_path, exist_ok=True)
+
+        import numpy as np
+
+        try:
+            # Sheets are decoded and written one at a time to keep memory bounded
+            reader = open_workbook(self.excel_path, self.backend)
+            try:
+                sheet_names = list(reader.sheet_names)
+                for i, sheet_name in enumerate(sheet_names):
+                    df = reader.parse(sheet_name, header=None, dtype=str)
+                    mask = df.isna().to_numpy()
+                    values = df.fillna('').to_numpy(dtype=str)
+                    np.savez(os.path.join(tmp_path, f"sheet_{i}.npz"), values=values, mask=mask)
+            finally:
+                reader.close()
+
+            with open(os.path.join(tmp_path, 'manifest.json'), 'w', encoding='utf-8') as fh:
+                json.dump({
+                    'workbook': self.excel_path,
+                    'sha256': self.workbook_hash,
+                    'backend': self.backend,
+                    'sheet_names': sheet_names,
+                }, fh, indent=2)
+        except BaseException:
+            # Leave no half-built cache folder behind
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        try:
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # Another process finished the same cache first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def grid(self, sheet_name):
+        """Return the raw sheet grid: object values, NaN for empty cells."""
+        import pandas as pd
+
+        return pd.DataFrame(self._values(sheet_name), copy=True)
+
+    def _values(self, sheet_name):
+        import numpy as np
+
+        if sheet_name not in self._grids:
+            if sheet_name not in self.sheet_names:
+                raise ValueError(f"Worksheet named '{sheet_name}' not found")
+            index = self.sheet_names.index(sheet_name)
+            with np.load(os.path.join(self.cache_path, f"sheet_{index}.npz")) as data:
+                values = data['values'].astype(object)
+                values[data['mask']] = np.nan
+            self._grids[sheet_name] = values
+        return self._grids[sheet_name]
+
+    def parse(self, sheet_name, header=None, dtype=str, usecols=None, skiprows=0, nrows=None):
+        """Drop-in for ExcelFile.parse(sheet_name, header=..., dtype=str).
+
+        usecols (0-based positions), skiprows and nrows slice the cached grid
+        before it is copied, so a cleaner only pays for the part it needs.
+        """
+        import pandas as pd
+        from xlsx_stream import mangle_columns
+
+        if dtype is not str:
+            raise ValueError("CachedWorkbook only serves dtype=str grids")
+        stop = None if nrows is None else skiprows + nrows + (0 if header is None else header + 1)
+        values = self._values(sheet_name)[skiprows:stop]
+        if usecols is None:
+            df = pd.DataFrame(values, copy=True)
+        else:
+            # pandas returns usecols in sheet order; positions past the sheet's
+            # last column come back empty, as in StreamingWorkbook
+            usecols = sorted(usecols)
+            inside = [col for col in usecols if col < values.shape[1]]
+            df = pd.DataFrame(values[:, inside], columns=inside, copy=True).reindex(columns=usecols)
+        if header is None:
+            return df
+        data = df.iloc[header + 1:].reset_index(drop=True)
+        data.columns = mangle_columns(df.iloc[header].tolist())
+        return data
+
+
+def open_workbook(excel_path=EXCEL_PATH, backend=XLSX_BACKEND):
+    """Open a workbook with the chosen reader backend ("stream" or "openpyxl").
+
+    Both expose sheet_names, parse(sheet_name, header=None, dtype=str) and close().
+    """
+    if backend == 'stream':
+        from xlsx_stream import StreamingWorkbook
+        return StreamingWorkbook(excel_path)
+    if backend == 'openpyxl':
+        import pandas as pd
+        return pd.ExcelFile(excel_path, engine='openpyxl')
+    raise ValueError(f"Unknown xlsx backend '{backend}', expected 'stream' or 'openpyxl'")
+
+
+def get_excel_file(use_cache=True, backend=XLSX_BACKEND):
+    """Load the main Excel workbook.
+
+    Returns a CachedWorkbook serving sheets from the sheet cache, or the bare
+    backend reader when use_cache is False.
+    """
+    if not use_cache:
+        return open_workbook(EXCEL_PATH, backend)
+    stat = os.stat(EXCEL_PATH)
+    key = (os.path.abspath(EXCEL_PATH), stat.st_size, stat.st_mtime_ns, backend)
+    if key not in _workbooks:
+        _workbooks[key] = CachedWorkbook(EXCEL_PATH, backend=backend)
+    return _workbooks[key]
+
+def series_csv_path():
+    """Return the series CSV to load: $RSI_SERIES_CSV, else the newest data/series-DDMMYY.csv."""
+    if os.environ.get('RSI_SERIES_CSV'):
+        return os.environ['RSI_SERIES_CSV']
+
+    def release_date(path):
+        stem = os.path.basename(path)[len('series-'):-len('.csv')]
+        try:
+            return datetime.strptime(stem, '%d%m%y')
+        except ValueError:
+            return datetime.fromtimestamp(os.path.getmtime(path))
+
+    paths = glob.glob(SERIES_CSV_GLOB)
+    if not paths:
+        raise FileNotFoundError(f"No series CSV matching {SERIES_CSV_GLOB}")
+    return max(paths, key=release_date)
+
+def series_release_date(path=None):
+    """Return the "Release date" from a series CSV header as a date (None if absent)."""
+    path = path or series_csv_path()
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        for row, _ in zip(csv.reader(fh), range(20)):
+            if len(row) > 1 and row[0].strip().lower() == 'release date':
+                for fmt in ('%d-%m-%Y', '%d %B %Y', '%d/%m/%Y'):
+                    try:
+                        return datetime.strptime(row[1].strip(), fmt).date()
+                    except ValueError:
+                        pass
+    return None
 
 def get_csv_data():
     """Load the series CSV file."""
-    csv_path = 'data/series-210325.csv'
-    return pd.read_csv(csv_path)
+    import pandas as pd
+    return pd.read_csv(series_csv_path())
 
 def list_sheet_names(xls):
     """Print all available sheet names from the Excel file."""
@@ -29,13 +236,21 @@ def list_sheet_names(xls):
    # print(df_csv.head(rows))
 
 
-# Test block: Only runs when this file is executed directly
-if __name__ == "__main__":
-    # Load both files
+def main():
+    from xlsx_stream import peak_rss_mb
+
+    # Load both files (builds the sheet cache on first run)
     xls = get_excel_file()
     df_csv = get_csv_data()
 
     # Test previews
     list_sheet_names(xls)
+    print("Sheet cache:", xls.cache_path)
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
     # preview_all_sheets(xls)
-    # preview_csv(df_csv)
\ No newline at end of file
+    # preview_csv(df_csv)
+
+
+# Test block: Only runs when this file is executed directly
+if __name__ == "__main__":
+    main()
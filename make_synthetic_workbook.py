@@ -0,0 +1,192 @@
+# make_synthetic_workbook.py
+
+import argparse
+import calendar
+import os
+import random
+
+from openpyxl import Workbook
+
+MONTHS = [calendar.month_abbr[i] for i in range(1, 13)]
+LAST_YEAR = 2024
+
+# (dual-table header with note, dual AGG/SIC, Table 1-4 description, Table 1/2 AGG/SIC code)
+DESCRIPTIONS = [
+    ("All retailing including automotive fuel [note1]", "Agg 21", "All Retailing, Including Automotive Fuel", "AGG21"),
+    ("All retailing excluding automotive fuel [note1]", "Agg 21X", "All Retailing, Excluding Automotive Fuel", "AGG21X"),
+    ("Predominantly food stores", "Agg 1", "Predominantly Food Stores", "AGG1"),
+    ("Total of predominantly non-food stores [note2]", "Agg 12", "Total Of Predominantly Non-Food Stores", "AGG12"),
+    ("Non-specialised food stores", "47.11", "Non-specialised Food Stores", "47.11"),
+    ("Household goods stores", "Agg 7", "Household Goods Stores", "AGG7"),
+]
+
+# Dual-table sheets (clean_dual_table_worksheet_v2); extra ones are named Table ID2, Table ID3, ...
+DUAL_SHEETS = ["CPSA", "CPSA1", "KPSA", "KPSA1", "Table ID1"]
+DUAL_TABLES = ["Index number of sales per week", "Percentage change on same month a year earlier"]
+BUSINESS_SIZES = ["All Businesses", "Large Businesses", "Small Businesses"]
+
+RELEASE_DATE = "19-02-2025"
+
+
+def periods(frequency, first_year, last_year):
+    """Date labels as the workbook writes them: 2020, 2020 Q1, 2020 Jan."""
+    labels = []
+    for year in range(first_year, last_year + 1):
+        if frequency == "A":
+            labels.append(str(year))
+        elif frequency == "Q":
+            labels += [f"{year} Q{q}" for q in range(1, 5)]
+        else:
+            labels += [f"{year} {month}" for month in MONTHS]
+    return labels
+
+
+def random_value():
+    return round(random.uniform(50, 150), 1)
+
+
+def write_block(ws, table_name, header_rows, dates, ncols):
+    """Append one table: name row, header rows, then one row per date (about 3% "[x]" cells).
+
+    Returns the number of data cells written.
+    """
+    ws.append([table_name])
+    for row in header_rows:
+        ws.append(row)
+    for date in dates:
+        ws.append([date] + [random_value() if random.random() > 0.03 else "[x]" for _ in range(ncols)])
+    ws.append([])
+    return len(dates) * ncols
+
+
+def write_series_csv(path, first_year=1950, last_year=LAST_YEAR):
+    """ONS time series CSV (RPI CDKO layout): metadata rows, annual values, then monthly values."""
+    with open(path, "w") as fh:
+        fh.write('"Title","Retail Prices Index: Long run series"\n"CDID","CDKO"\n"Source dataset ID","MM23"\n'
+                 '"PreUnit",""\n"Unit","Index, base year = 100"\n'
+                 f'"Release date","{RELEASE_DATE}"\n'
+                 '"Next release","26 March 2025"\n"Important notes",\n')
+        for year in range(first_year, last_year + 1):
+            fh.write(f'"{year}","{random_value()}"\n')
+        for year in range(first_year, last_year + 1):
+            for month in MONTHS:
+                fh.write(f'"{year} {month.upper()}","{random_value()}"\n')
+
+
+def make_workbook(out, ncols=6, years=5, sheets=len(DUAL_SHEETS), seed=0):
+    """Write out/data/mainreferencetables.xlsx and a series CSV in every layout the cleaners parse.
+
+    Size is dual-table sheets x columns per table x years. Returns the number
+    of data cells in the workbook.
+    """
+    random.seed(seed)
+    os.makedirs(os.path.join(out, "data"), exist_ok=True)
+    descriptions = (DESCRIPTIONS * (ncols // len(DESCRIPTIONS) + 1))[:ncols]
+    first_year = LAST_YEAR - years + 1
+    cells = 0
+
+    wb = Workbook()
+    cover = wb.active
+    cover.title = "Cover Sheet"
+    cover.append(["Retail sales"])
+    # Error cells (openpyxl stores these strings as errors) for xlsx_stream.py --check
+    cover.append(["#N/A", "#DIV/0!", "#REF!"])
+    contents = wb.create_sheet("Contents")
+    contents.append(["Contents"])
+    contents.append([])
+    contents.append(["Worksheet number", "Worksheet description"])
+    notes = wb.create_sheet("Notes")
+    notes.append(["Notes"])
+    notes.append(["Note number", "Note text"])
+    for i in range(1, 4):
+        notes.append([f"Note {i}", f"note text {i}"])
+
+    names = []
+    dual_sheets = DUAL_SHEETS[:sheets] + [f"Table ID{i}" for i in range(2, sheets - len(DUAL_SHEETS) + 2)]
+    for sheet in dual_sheets:
+        names.append(sheet)
+        ws = wb.create_sheet(sheet)
+        ws.append([f"{sheet} title"])
+        for table_name in DUAL_TABLES:
+            header = [["Time Period"] + [d[0] for d in descriptions],
+                      ["AGG/SIC"] + [d[1] for d in descriptions],
+                      ["Dataset identifier code"] + [f"{sheet[:2]}{i}{table_name[0]}" for i in range(ncols)]]
+            cells += write_block(ws, table_name, header,
+                                 periods("M", first_year, LAST_YEAR) + periods("A", first_year, LAST_YEAR), ncols)
+
+    # Table 1 has the 5-row header (with sales and percentage weight), Table 2 the 3-row one
+    for table in (1, 2):
+        for frequency in "AQM":
+            sheet = f"Table {table} {frequency}"
+            names.append(sheet)
+            ws = wb.create_sheet(sheet)
+            ws.append([sheet])
+            header = [["Time period"] + [d[2] for d in descriptions]]
+            if table == 1:
+                header.append(["Sales in 2022"] + ["(£494,298m)"] * ncols)
+            header.append(["AGG/SIC code"] + [d[3] for d in descriptions])
+            if table == 1:
+                header.append(["Percentage weight"] + [str(round(100 / ncols, 2))] * ncols)
+            header.append(["Dataset identifier code"] + [f"T{table}{i}" for i in range(ncols)])
+            cells += write_block(ws, "Index number of sales per week", header,
+                                 periods(frequency, first_year, LAST_YEAR), ncols)
+
+    # Table 3/4 descriptions carry a business-size suffix, plus one without
+    for table in (3, 4):
+        for frequency in "AQM":
+            sheet = f"Table {table} {frequency}"
+            names.append(sheet)
+            ws = wb.create_sheet(sheet)
+            ws.append([sheet])
+            columns = [f"{d[2]}, {size}" for d in descriptions[:max(1, ncols // 3)] for size in BUSINESS_SIZES]
+            columns.append("Pharmaceutical, Medical, Cosmetic & Toilet Goods")
+            header = [["Time period"] + columns,
+                      ["Sales in 2022"] + ["(£1,000m)"] * len(columns),
+                      ["Dataset identifier code"] + [f"T{table}{frequency}{i}" for i in range(len(columns))]]
+            cells += write_block(ws, "Index number of sales per week", header,
+                                 periods(frequency, first_year, LAST_YEAR), len(columns))
+
+    ws = wb.create_sheet("Table 5")
+    names.append("Table 5")
+    ws.append(["Table 5"])
+    for frequency, label in (("A", "Annually"), ("M", "Monthly")):
+        header = [["Time Period"] + [f"Commodity {i} [note3]" for i in range(ncols)],
+                  ["Average weekly sales in 2022 (£ millions)"] + [f"{1000 + i:,}" for i in range(ncols)],
+                  ["Dataset identifier code"] + [f"T5{i}" for i in range(ncols)]]
+        cells += write_block(ws, f"Index numbers of sales per week - {label}", header,
+                             periods(frequency, first_year, LAST_YEAR), ncols)
+
+    # Table 6: upper-case business types, "[c]" (confidential) and "[x]"-suffixed cells
+    ws = wb.create_sheet("Table 6")
+    names.append("Table 6")
+    ws.append(["Table 6"])
+    ws.append([])
+    ws.append(["Business type", "ALL BUSINESSES - INDEX", "LARGE - INDEX", "SMALL - INDEX"])
+    for d in descriptions:
+        ws.append([d[0].upper().replace("[NOTE1]", "[Note 1]"), random_value(), "[c]", f"{random_value()} [x]"])
+        cells += 3
+
+    for sheet in names:
+        contents.append([sheet, f"{sheet} - description"])
+    wb.save(os.path.join(out, "data", "mainreferencetables.xlsx"))
+
+    day, month, year = RELEASE_DATE.split("-")
+    write_series_csv(os.path.join(out, "data", f"series-{day}{month}{year[2:]}.csv"))
+    return cells
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic RSI workbook and series CSV for testing and benchmarks.")
+    parser.add_argument("out", help="folder to write data/mainreferencetables.xlsx and data/series-DDMMYY.csv to")
+    parser.add_argument("--cols", type=int, default=6, help="series columns per table")
+    parser.add_argument("--years", type=int, default=5, help="years of observations per table")
+    parser.add_argument("--sheets", type=int, default=len(DUAL_SHEETS), help="dual-table sheets (CPSA, KPSA, Table ID...)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cells = make_workbook(args.out, args.cols, args.years, args.sheets, args.seed)
+    print(f"✅ Synthetic workbook with {cells:,} data cells saved to: {os.path.join(args.out, 'data')}")
+
+
+if __name__ == "__main__":
+    main()
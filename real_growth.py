@@ -0,0 +1,133 @@
+# real_growth.py
+
+import os
+
+import pandas as pd
+
+from rsi_period import parse_periods, period_to_timestamp
+from rsi_schema import read_merged_csv
+from series_store import normalise_key
+
+MERGED_CSV = "cleansed/rsi_data_merged.csv"
+MAPPING_PATH = "real_growth_map.txt"
+OUTPUT_PATH = "cleansed/real_growth.csv"
+
+# Columns identifying one series in rsi_data_merged (table_code is left out:
+# it is derived from the table name, so a reworded name would make a rule
+# stop matching)
+SERIES_COLS = ["sheet_name", "dataset_code", "agg_sic_code"]
+
+# Real growth (%) = nominal growth (%) - price growth (implied deflator) (%)
+# Each mapping row pairs nominal series with the deflator series of the same
+# agg_sic_code. Blank fields match any value, so a row with a blank
+# agg_sic_code covers every sector found on both sides; rows naming an
+# agg_sic_code take precedence for that sector. A sheet holding several
+# tables needs dataset codes to tell them apart, else its pairs are ambiguous.
+MAPPING_COLS = ["agg_sic_code",
+                "nominal_sheet", "nominal_dataset_code",
+                "deflator_sheet", "deflator_dataset_code"]
+
+NOMINAL_COLS = [f"{col}_nominal" for col in SERIES_COLS]
+DEFLATOR_COLS = [f"{col}_deflator" for col in SERIES_COLS]
+
+
+def load_mapping(path=MAPPING_PATH):
+    """Read the nominal -> deflator mapping (pipe separated, like manual_agg_ref.txt)."""
+    mapping = pd.read_csv(path, sep="|", dtype=str).fillna("")
+    obsolete = [col for col in mapping.columns if col.endswith("_table_code")]
+    if obsolete:
+        raise ValueError(f"{path}: {', '.join(obsolete)} no longer supported, select series by sheet and dataset code")
+    return mapping.reindex(columns=MAPPING_COLS, fill_value="")
+
+
+def list_series(df):
+    """Distinct series of the merged frame, with case-insensitive match keys."""
+    series = df[SERIES_COLS].astype(object).drop_duplicates().reset_index(drop=True)
+    for col in SERIES_COLS:
+        series[f"{col}_key"] = normalise_key(series[col]).to_numpy()
+    return series
+
+
+def _matching(series, agg_sic_code, sheet, dataset_code):
+    mask = pd.Series(series["agg_sic_code_key"] != "", index=series.index)
+    for col, wanted in zip(SERIES_COLS, (sheet, dataset_code, agg_sic_code)):
+        if wanted.strip():
+            mask &= series[f"{col}_key"] == wanted.strip().upper()
+    return series[mask]
+
+
+def resolve_pairs(series, mapping):
+    """Expand the mapping into one row per (nominal series, deflator series) pair.
+
+    A nominal series matching several deflator series under its rule is
+    reported and skipped rather than paired arbitrarily.
+    """
+    rules = mapping.assign(specific=mapping["agg_sic_code"].str.strip() != "")
+    rules = rules.sort_values("specific", ascending=False, kind="stable").reset_index(drop=True)
+
+    pairs = []
+    for rule_id, rule in rules.iterrows():
+        nominal = _matching(series, rule.agg_sic_code, rule.nominal_sheet, rule.nominal_dataset_code)
+        deflator = _matching(series, rule.agg_sic_code, rule.deflator_sheet, rule.deflator_dataset_code)
+        paired = nominal[SERIES_COLS + ["agg_sic_code_key"]].merge(
+            deflator[SERIES_COLS + ["agg_sic_code_key"]], on="agg_sic_code_key", suffixes=("_nominal", "_deflator"))
+        pairs.append(paired.assign(rule=rule_id))
+
+    pairs = pd.concat(pairs, ignore_index=True) if pairs else pd.DataFrame(columns=NOMINAL_COLS + DEFLATOR_COLS)
+    if pairs.empty:
+        print("⚠️ No nominal/deflator series pairs found for", MAPPING_PATH)
+        return pairs[NOMINAL_COLS + DEFLATOR_COLS]
+
+    # Each nominal series follows its most specific rule only
+    pairs = pairs[pairs["rule"] == pairs.groupby(NOMINAL_COLS, dropna=False)["rule"].transform("min")]
+    ambiguous = pairs.duplicated(NOMINAL_COLS, keep=False)
+    if ambiguous.any():
+        print(f"⚠️ Skipped {ambiguous.sum()} ambiguous nominal/deflator pairs:")
+        print(pairs.loc[ambiguous, NOMINAL_COLS + DEFLATOR_COLS].to_string(index=False))
+    return pairs.loc[~ambiguous, NOMINAL_COLS + DEFLATOR_COLS].reset_index(drop=True)
+
+
+def compute_real_growth(df, mapping):
+    """Real growth for every mapped pair in one pass, aligned on (frequency, period_key).
+
+    Returns one tidy row per pair and period with the nominal and deflator
+    series identifiers, nominal_growth, price_growth and real_growth.
+    """
+    pairs = resolve_pairs(list_series(df), mapping).rename_axis("pair_id").reset_index()
+    columns = (["agg_sic_code", "frequency", "date", "year", "month", "period_key", "period_start"]
+               + NOMINAL_COLS[:-1] + DEFLATOR_COLS[:-1] + ["nominal_growth", "price_growth", "real_growth"])
+    if pairs.empty:
+        return pd.DataFrame(columns=columns)
+
+    obs = df[SERIES_COLS + ["frequency", "period_key", "date", "value"]].astype(
+        {col: object for col in SERIES_COLS + ["frequency", "date"]})
+
+    def side(cols, value_col):
+        lookup = pairs[["pair_id"] + cols].rename(columns=dict(zip(cols, SERIES_COLS)))
+        return lookup.merge(obs, on=SERIES_COLS).drop(columns=SERIES_COLS).rename(columns={"value": value_col})
+
+    nominal = side(NOMINAL_COLS, "nominal_growth")
+    deflator = side(DEFLATOR_COLS, "price_growth").drop(columns="date")
+    out = pairs.merge(nominal.merge(deflator, on=["pair_id", "frequency", "period_key"]), on="pair_id")
+    out["agg_sic_code"] = out["agg_sic_code_nominal"]
+    out["real_growth"] = out["nominal_growth"] - out["price_growth"]
+
+    periods = parse_periods(out["date"])
+    out["year"] = periods["year"]
+    out["month"] = periods["month"]
+    out["period_start"] = period_to_timestamp(periods)
+    out = out.sort_values(["agg_sic_code", "pair_id", "frequency", "period_key"], kind="stable")
+    return out[columns].reset_index(drop=True)
+
+
+def main():
+    df = read_merged_csv(MERGED_CSV)
+    out = compute_real_growth(df, load_mapping(MAPPING_PATH))
+
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    out.to_csv(OUTPUT_PATH, index=False)
+    print(f"✅ Real growth for {out['agg_sic_code'].nunique()} sectors ({len(out)} rows) saved to: {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
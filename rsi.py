@@ -0,0 +1,169 @@
+# rsi.py
+
+import argparse
+import importlib
+import os
+import sys
+
+# Only the standard library is imported up front; pandas and the stage
+# modules are imported inside the subcommands that need them, so status and
+# sheets start in a fraction of the time a pandas import takes.
+
+
+def stage_module(name):
+    """Module name of a stage or script given as "clean_notes" or "clean_notes.py"."""
+    return os.path.basename(name)[:-3] if name.endswith(".py") else name
+
+
+def cmd_run(args):
+    from run_all import main as run_all_main
+    run_all_main(args.options)
+
+
+def cmd_stage(args):
+    from run_manifest import measure
+
+    module = importlib.import_module(stage_module(args.script))
+    if not hasattr(module, "main"):
+        sys.exit(f"{args.script} has no main() to run")
+    sys.argv = [module.__file__] + args.options  # the stage's own argparse sees only its options
+    record = measure(module.main, label=module.__name__)
+    peak = f", peak RSS {record['peak_rss_mb']:.0f} MB" if record["peak_rss_mb"] is not None else ""
+    print(f"✅ {module.__name__} finished in {record['wall_seconds']:.2f}s (CPU {record['cpu_seconds']:.2f}s{peak})")
+
+
+def stage_states(stages, cache_dir, last=None):
+    """(script, state) per stage: missing outputs, waiting on inputs, up to date or changed.
+
+    "up to date" means the artifact cache holds a run of the stage's current
+    code on its current inputs; "changed" means it does not (new code or
+    inputs, or the stage last ran with the cache off). last maps scripts to
+    their latest manifest record: a file the stage rewrites in place (e.g.
+    rsi_data_merged.csv in table_name_clean.py) counts as the input that
+    run recorded while it still holds that run's output.
+    """
+    from artifact_cache import ArtifactCache
+    from run_all import SCRIPT_DIR
+    from run_manifest import FileStats, expand
+
+    stats = FileStats()
+    cache = ArtifactCache(cache_dir, SCRIPT_DIR, stats)
+    last = last or {}
+    for stage in stages:
+        inputs = [path for declared in stage["reads"] for path in expand(declared)]
+        outputs = [path for declared in stage["writes"] for path in expand(declared)]
+        if not all(os.path.exists(path) for path in inputs):
+            state = "waiting on inputs"
+        elif not all(os.path.exists(path) for path in outputs):
+            state = "missing outputs"
+        elif cache.has(cache.key(stage, _stage_inputs(stage, stats, last.get(stage["script"])))):
+            state = "up to date"
+        else:
+            state = "changed"
+        yield stage["script"], state
+
+
+def _stage_inputs(stage, stats, record):
+    current = stats.paths(stage["reads"])
+    if not record or "inputs" not in record:
+        return current
+    recorded_in = {i["path"]: i for i in record["inputs"]}
+    recorded_out = {o["path"]: o["sha256"] for o in record["outputs"]}
+    return [recorded_in.get(i["path"], i) if recorded_out.get(i["path"]) == i["sha256"] else i for i in current]
+
+
+def cmd_status(args):
+    from artifact_cache import CACHE_DIR
+    from run_all import STAGES
+    from run_manifest import MANIFEST_PATH, read_manifest
+
+    last = {}
+    for record in read_manifest(MANIFEST_PATH):
+        last[record["stage"]] = record
+    width = max(len(stage["script"]) for stage in STAGES)
+    print(f"{'stage':<{width}}  {'state':<17}  last run")
+    for script, state in stage_states(STAGES, CACHE_DIR, last):
+        record = last.get(script)
+        if record is None:
+            ran = "-"
+        else:
+            how = "restored" if record.get("cached") else f"{record['wall_seconds']:.2f}s"
+            ran = f"{record['run_id']} ({how})"
+        print(f"{script:<{width}}  {state:<17}  {ran}")
+
+
+def cmd_sheets(args):
+    from load_rsi_data_v2 import EXCEL_PATH, cached_sheet_names
+
+    if not os.path.exists(EXCEL_PATH):
+        sys.exit(f"{EXCEL_PATH} not found")
+    names = cached_sheet_names()
+    if names is None:
+        if not args.open:
+            sys.exit("No sheet cache for this workbook yet; run `rsi stage load_rsi_data_v2` or use --open")
+        from load_rsi_data_v2 import get_excel_file
+        names = get_excel_file().sheet_names
+    print("\n".join(names))
+
+
+def cmd_query(args):
+    import sqlite3
+    import time
+
+    from export_sqlite import read_series
+
+    if not os.path.exists(args.db):
+        sys.exit(f"{args.db} not found; run `rsi stage export_sqlite` first")
+    conn = sqlite3.connect(args.db)
+    try:
+        start = time.perf_counter()
+        series = read_series(conn, args.dataset_code.upper() if args.dataset_code else None, args.frequency,
+                             args.agg_sic_code.upper() if args.agg_sic_code else None)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        conn.close()
+    print(series.to_string(index=False))
+    print(f"🔎 {len(series)} rows in {elapsed:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="rsi", description="Retail Sales Index pipeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the whole pipeline (options are passed to run_all.py)",
+                         add_help=False)
+    run.add_argument("options", nargs=argparse.REMAINDER)
+    run.set_defaults(func=cmd_run)
+
+    stage = sub.add_parser("stage", help="run one stage or script, e.g. rsi stage anomaly --incremental")
+    stage.add_argument("script")
+    stage.add_argument("options", nargs=argparse.REMAINDER, help="passed to the script")
+    stage.set_defaults(func=cmd_stage)
+
+    status = sub.add_parser("status", help="which stages are up to date, from the artifact cache and run manifest")
+    status.set_defaults(func=cmd_status)
+
+    sheets = sub.add_parser("sheets", help="list the workbook's sheets from the sheet cache")
+    sheets.add_argument("--open", action="store_true", help="open the workbook if it is not cached yet")
+    sheets.set_defaults(func=cmd_sheets)
+
+    query = sub.add_parser("query", help="read one series from the SQLite export")
+    query.add_argument("dataset_code", nargs="?")
+    query.add_argument("--agg-sic-code")
+    query.add_argument("--frequency")
+    query.add_argument("--db", default="cleansed/rsi.sqlite")
+    query.set_defaults(func=cmd_query)
+
+    # Options after "run"/"stage" belong to run_all.py or the script, not to rsi
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command not in ("run", "stage"):
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.command in ("run", "stage"):
+        args.options = extra + args.options
+    if args.command == "query" and not (args.dataset_code or args.agg_sic_code):
+        parser.error("query needs a dataset_code or --agg-sic-code")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# rsi_parquet.py
+
+import os
+import shutil
+from urllib.parse import unquote
+
+from rsi_schema import apply_schema
+
+MERGED_CSV = "cleansed/rsi_data_merged.csv"
+MERGED_DATASET = "cleansed/rsi_data_merged_parquet"
+PARTITION_COLS = ["sheet_name", "frequency"]
+
+# Sort order inside each partition, so row-group min/max statistics let the
+# reader skip row groups when filtering on these columns
+SORT_COLS = ["dataset_code", "agg_sic_code", "year"]
+
+
+def _to_arrow(df):
+    """Convert the merged frame (already in MERGED_SCHEMA) to an Arrow table with dictionary strings."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in table.schema:
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type) or pa.types.is_null(field.type):
+            fields.append(pa.field(field.name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(field)
+    return table.cast(pa.schema(fields))
+
+
+def _write_dataset(df, path):
+    """Write df as a hive-partitioned Parquet dataset into a fresh folder."""
+    import pyarrow.dataset as ds
+
+    sort_cols = [col for col in PARTITION_COLS + SORT_COLS if col in df.columns]
+    table = _to_arrow(df.sort_values(sort_cols, kind="stable"))
+    shutil.rmtree(path, ignore_errors=True)
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=ds.partitioning(table.select(PARTITION_COLS).schema, flavor="hive"),
+        max_rows_per_group=50_000,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def _partition_dirs(path):
+    """Return {(sheet_name, frequency): folder} for the partitions under path."""
+    dirs = {}
+    for sheet_dir in os.listdir(path) if os.path.isdir(path) else []:
+        for freq_dir in os.listdir(os.path.join(path, sheet_dir)):
+            key = tuple(unquote(part.split("=", 1)[1]) for part in (sheet_dir, freq_dir))
+            dirs[key] = os.path.join(path, sheet_dir, freq_dir)
+    return dirs
+
+
+def write_merged_dataset(df, path=MERGED_DATASET):
+    """Write the merged frame as a Parquet dataset partitioned by sheet_name/frequency.
+
+    The folder is replaced as a whole so it always mirrors rsi_data_merged.csv.
+    Returns False (and writes nothing) when pyarrow is not installed.
+    """
+    try:
+        import pyarrow.dataset  # noqa: F401
+    except ImportError:
+        print("⚠️ pyarrow not installed, skipped Parquet output:", path)
+        return False
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    _write_dataset(apply_schema(df), tmp_path)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_partitions(df, partitions, path=MERGED_DATASET):
+    """Rewrite only the given (sheet_name, frequency) partitions of the dataset from df.
+
+    df is the full new merged frame; rows outside the listed partitions are
+    ignored and their folders are not touched. A listed partition with no rows
+    left in df is removed. Returns False when pyarrow is not installed.
+    """
+    try:
+        import pyarrow.dataset  # noqa: F401
+    except ImportError:
+        print("⚠️ pyarrow not installed, skipped Parquet output:", path)
+        return False
+    if not os.path.isdir(path):
+        return write_merged_dataset(df, path)
+
+    partitions = {(str(sheet), str(freq)) for sheet, freq in partitions}
+    df = apply_schema(df)
+    keys = list(zip(df["sheet_name"].astype(str), df["frequency"].astype(str)))
+    subset = df[[key in partitions for key in keys]]
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    _write_dataset(subset, tmp_path)
+    new_dirs = _partition_dirs(tmp_path)
+    for key, old_dir in _partition_dirs(path).items():
+        if key in partitions and key not in new_dirs:
+            shutil.rmtree(old_dir)
+    for key, new_dir in new_dirs.items():
+        target = os.path.join(path, os.path.relpath(new_dir, tmp_path))
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(new_dir, target)
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    for sheet_dir in os.listdir(path):
+        if not os.listdir(os.path.join(path, sheet_dir)):
+            os.rmdir(os.path.join(path, sheet_dir))
+    return True
+
+
+def save_merged(df, csv_path=MERGED_CSV, dataset_path=MERGED_DATASET):
+    """Save the merged RSI data as CSV and as the partitioned Parquet dataset."""
+    df.to_csv(csv_path, index=False)
+    if write_merged_dataset(df, dataset_path):
+        print("🗂️ Parquet dataset saved to:", dataset_path)
+
+
+def read_merged(path=MERGED_DATASET, columns=None, **filters):
+    """Read the merged RSI data, pushing filters down to partitions and row groups.
+
+    Each keyword names a column: a single value matches it exactly, a list or
+    set matches any of its values and a (low, high) tuple selects an inclusive
+    range, e.g. read_merged(sheet_name="CPSA1", dataset_code="IDIL",
+    year=(2020, 2024)). sheet_name and frequency prune whole partition folders;
+    the other columns are checked against row-group statistics first.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        path, format="parquet",
+        partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+    )
+
+    expression = None
+    for col, wanted in filters.items():
+        field = ds.field(col)
+        if isinstance(wanted, tuple):
+            low, high = wanted
+            condition = (field >= low) & (field <= high)
+        elif isinstance(wanted, (list, set, frozenset)):
+            condition = field.isin(list(wanted))
+        else:
+            condition = field == wanted
+        expression = condition if expression is None else expression & condition
+
+    table = dataset.to_table(columns=columns, filter=expression)
+    return apply_schema(table.to_pandas())
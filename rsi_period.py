@@ -0,0 +1,73 @@
+# rsi_period.py
+
+import calendar
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# "2020", "2020 Q1", "2020 Jan" / "2020 JUN" / "2020 June"
+PERIOD_RE = re.compile(r"^(\d{4})(?:\s+(?:Q([1-4])|([A-Za-z]+)))?$", re.IGNORECASE)
+MONTHS = {abbr.upper(): idx for idx, abbr in enumerate(calendar.month_abbr) if abbr}
+
+PERIOD_COLUMNS = ["frequency", "year", "month", "quarter", "month_name", "period_key"]
+
+
+@lru_cache(maxsize=None)
+def parse_period(date_str):
+    """Parse one date label into (frequency, year, month, quarter, month_name, period_key).
+
+    month is 1-12 for monthly labels and 0 otherwise (as in rsi_data_merged);
+    quarter is 1-4 for monthly and quarterly labels. period_key is yyyymm of
+    the last month the period covers (2020 -> 202012, 2020 Q2 -> 202006,
+    2020 Jan -> 202001), so keys sort across frequencies. Month names match
+    case-insensitively on their first three letters.
+    """
+    text = date_str.strip()
+    year_match = re.match(r"^\d{4}", text)
+    year = int(year_match.group(0)) if year_match else None
+    match = PERIOD_RE.match(text)
+    if not match:
+        return "unknown", year, 0, 0, "", None
+
+    quarter, word = match.group(2), match.group(3)
+    if quarter:
+        quarter = int(quarter)
+        return "quarterly", year, 0, quarter, "", year * 100 + quarter * 3
+    if word:
+        month = MONTHS.get(word[:3].upper(), 0)
+        if not month:
+            return "monthly", year, 0, 0, word[:3], None
+        return "monthly", year, month, (month - 1) // 3 + 1, word[:3], year * 100 + month
+    return "annual", year, 0, 0, "", year * 100 + 12
+
+
+def parse_periods(dates):
+    """Parse a column of date labels; each distinct label is parsed only once.
+
+    Returns a frame with PERIOD_COLUMNS on the index of dates. Missing dates
+    come back as frequency "unknown" with empty year and period_key.
+    """
+    dates = pd.Series(dates)
+    codes, uniques = pd.factorize(dates)
+    parsed = pd.DataFrame([parse_period(str(d)) for d in uniques], columns=PERIOD_COLUMNS)
+    parsed.loc[len(parsed)] = ["unknown", None, 0, 0, "", None]  # code -1 (missing date)
+
+    result = parsed.iloc[np.where(codes < 0, len(parsed) - 1, codes)]
+    result = result.astype({"year": "Int16", "month": "int8", "quarter": "int8", "period_key": "Int32"})
+    result.index = dates.index
+    return result
+
+
+def detect_frequency(dates):
+    """Vectorised frequency of a column of date labels (monthly/quarterly/annual/unknown)."""
+    return parse_periods(dates)["frequency"]
+
+
+def period_to_timestamp(periods):
+    """First day of each period as a Timestamp, from a parse_periods frame."""
+    month = np.where(periods["frequency"] == "quarterly", periods["quarter"] * 3 - 2,
+                     np.where(periods["frequency"] == "monthly", periods["month"], 1))
+    parts = pd.DataFrame({"year": periods["year"], "month": month, "day": 1}, index=periods.index)
+    return pd.to_datetime(parts.astype("float64"), errors="coerce")
@@ -0,0 +1,262 @@
+# rsi_profile.py
+
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 100_000
+
+# Distinct counts are exact up to this many distinct values per column, then
+# switch to a HyperLogLog estimate (about 0.8% standard error with p=14)
+EXACT_DISTINCT_LIMIT = 200_000
+HLL_PRECISION = 14
+
+DTYPE_ORDER = ["empty", "bool", "int64", "float64", "object"]
+
+
+class HyperLogLog:
+    """Mergeable approximate distinct counter over 64-bit hashes."""
+
+    def __init__(self, p=HLL_PRECISION):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def add(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # Remaining bits with a guard bit, so the rank stays within 64 - p + 1
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = (64 - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class DistinctCounter:
+    """Exact distinct count of hashes until `limit`, then HyperLogLog."""
+
+    def __init__(self, limit=EXACT_DISTINCT_LIMIT):
+        self.limit = limit
+        self.exact = np.empty(0, dtype=np.uint64)
+        self.hll = None
+
+    def add(self, hashes):
+        if self.hll is not None:
+            self.hll.add(hashes)
+            return
+        self.exact = np.union1d(self.exact, hashes)
+        if len(self.exact) > self.limit:
+            self.hll = HyperLogLog()
+            self.hll.add(self.exact)
+            self.exact = None
+
+    def merge(self, other):
+        if self.hll is None and other.hll is None:
+            self.add(other.exact)
+            return
+        if self.hll is None:
+            self.hll = HyperLogLog()
+            self.hll.add(self.exact)
+            self.exact = None
+        if other.hll is None:
+            self.hll.add(other.exact)
+        else:
+            self.hll.merge(other.hll)
+
+    @property
+    def approximate(self):
+        return self.hll is not None
+
+    def count(self):
+        return self.hll.count() if self.hll is not None else len(self.exact)
+
+
+def _column_dtype(series):
+    if series.isna().all():
+        return "empty"
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    if pd.api.types.is_integer_dtype(series):
+        return "int64"
+    if pd.api.types.is_float_dtype(series):
+        return "float64"
+    return "object"
+
+
+def _canonical_text(values):
+    """One string per value whatever the chunk dtype: numbers as "5" or "5.5", so 5, 5.0 and "5" agree."""
+    text = values.astype(str).astype(object)
+    if pd.api.types.is_bool_dtype(values):
+        return text
+    if pd.api.types.is_numeric_dtype(values):
+        numbers = values.astype(np.float64)
+    else:
+        numbers = pd.to_numeric(text, errors="coerce").astype(np.float64)
+    integral = numbers.notna() & np.isfinite(numbers) & (numbers % 1 == 0) & (numbers.abs() < 2 ** 63)
+    fractional = numbers.notna() & ~integral
+    text[integral] = numbers[integral].astype(np.int64).astype(str)
+    text[fractional] = numbers[fractional].map(repr)
+    return text
+
+
+def _hash_values(series):
+    """64-bit hashes of the non-null values, taken over their canonical text so chunk dtypes never matter."""
+    return pd.util.hash_array(_canonical_text(series.dropna()).to_numpy(dtype=object))
+
+
+class ColumnProfile:
+    """Mergeable per-column accumulator: nulls, dtype, distinct count, max string length."""
+
+    def __init__(self, name, limit=EXACT_DISTINCT_LIMIT):
+        self.name = name
+        self.nulls = 0
+        self.non_nulls = 0
+        self.dtype = "empty"
+        self.max_length = None
+        self.distinct = DistinctCounter(limit)
+
+    def update(self, series):
+        nulls = int(series.isna().sum())
+        self.nulls += nulls
+        self.non_nulls += len(series) - nulls
+        dtype = _column_dtype(series)
+        self.dtype = max(self.dtype, dtype, key=DTYPE_ORDER.index)
+        if dtype == "object":
+            lengths = series.dropna().astype(str).str.len()
+            if len(lengths):
+                self.max_length = max(self.max_length or 0, int(lengths.max()))
+        self.distinct.add(_hash_values(series))
+
+    def merge(self, other):
+        self.nulls += other.nulls
+        self.non_nulls += other.non_nulls
+        self.dtype = max(self.dtype, other.dtype, key=DTYPE_ORDER.index)
+        if other.max_length is not None:
+            self.max_length = max(self.max_length or 0, other.max_length)
+        self.distinct.merge(other.distinct)
+
+    def summary(self):
+        unique = self.distinct.count()
+        return {
+            "Column": self.name,
+            "Count of null values": self.nulls,
+            "Count of non-null values": self.non_nulls,
+            "Data Type": self.dtype if self.dtype != "empty" else "object",
+            "Count of unique values": unique,
+            "Unique count approximate": self.distinct.approximate,
+            "Potential PK": unique == self.non_nulls and unique != 0,
+            "Max String Length (objects)": self.max_length if self.dtype == "object" else None,
+        }
+
+
+class TableProfile:
+    """Mergeable profile of a whole table, built one chunk at a time."""
+
+    def __init__(self, limit=EXACT_DISTINCT_LIMIT):
+        self.limit = limit
+        self.rows = 0
+        self.columns = {}
+        self.row_hashes = DistinctCounter(limit)
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(col, self.limit)
+            self.columns[col].update(chunk[col])
+        normalised = pd.DataFrame({
+            col: chunk[col].astype(np.float64) if pd.api.types.is_numeric_dtype(chunk[col])
+            else chunk[col].astype(object).where(chunk[col].notna(), None).astype(str)
+            for col in chunk.columns
+        })
+        self.row_hashes.add(pd.util.hash_pandas_object(normalised, index=False).to_numpy())
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+        self.row_hashes.merge(other.row_hashes)
+        return self
+
+    @property
+    def duplicate_rows(self):
+        return self.rows - self.row_hashes.count()
+
+    def summary(self):
+        """One row per column, like the notebook's profiling summary."""
+        return pd.DataFrame([profile.summary() for profile in self.columns.values()]).set_index("Column")
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrame chunks of a CSV, Parquet file or partitioned Parquet dataset."""
+    if path.endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=chunk_rows, low_memory=False)
+        return
+
+    import pyarrow.dataset as ds
+
+    if os.path.isdir(path):
+        dataset = ds.dataset(path, format="parquet",
+                             partitioning=ds.HivePartitioning.discover(infer_dictionary=True))
+    else:
+        dataset = ds.dataset(path, format="parquet")
+    for batch in dataset.to_batches(batch_size=chunk_rows):
+        chunk = batch.to_pandas()
+        for col in chunk.columns:
+            if isinstance(chunk[col].dtype, pd.CategoricalDtype):
+                chunk[col] = chunk[col].astype(object)
+        yield chunk
+
+
+def profile_path(path, chunk_rows=CHUNK_ROWS, limit=EXACT_DISTINCT_LIMIT):
+    """Profile a file in one chunked pass; only one chunk is held in memory."""
+    profile = TableProfile(limit)
+    for chunk in iter_chunks(path, chunk_rows):
+        profile.update(chunk)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cleansed CSV/Parquet outputs in one chunked pass.")
+    parser.add_argument("paths", nargs="*", help="files or Parquet folders (default: cleansed/*.csv)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--exact-limit", type=int, default=EXACT_DISTINCT_LIMIT,
+                        help="distinct values counted exactly before switching to HyperLogLog")
+    parser.add_argument("--out", help="folder to write <name>_profile.csv files to")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob("cleansed/*.csv"))
+    for path in paths:
+        profile = profile_path(path, args.chunk_rows, args.exact_limit)
+        summary = profile.summary()
+        print(f"\n📋 {path}")
+        print(f"nrows = {profile.rows:,}")
+        print(f"ncols = {len(profile.columns):,}")
+        print(f"duplicate rows = {profile.duplicate_rows:,}")
+        print(summary.to_string())
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            name = os.path.splitext(os.path.basename(path.rstrip("/")))[0]
+            summary.to_csv(os.path.join(args.out, f"{name}_profile.csv"))
+
+
+if __name__ == "__main__":
+    main()
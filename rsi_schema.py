@@ -0,0 +1,90 @@
+# rsi_schema.py
+
+import pandas as pd
+
+# Declared column types of rsi_data_merged (and of the cleaned files feeding it).
+# Repeated text is categorical, year/month are small nullable ints, value is float64.
+MERGED_SCHEMA = {
+    "sheet_name": "category",
+    "table_name": "category",
+    "date": "category",
+    "frequency": "category",
+    "value": "float64",
+    "agg_sic_code": "category",
+    "dataset_code": "category",
+    "year": "Int16",
+    "month_name": "category",
+    "month": "Int8",
+    "period_key": "Int32",
+    "table_code": "category",
+    "uid": "object",
+}
+
+NUMERIC_RANGES = {"year": (1000, 9999), "month": (0, 12), "period_key": (100001, 999912)}
+FREQUENCIES = {"monthly", "quarterly", "annual"}
+
+
+def csv_dtypes(schema=MERGED_SCHEMA):
+    """dtype= for read_csv: categoricals directly, numbers as text so apply_schema can report bad cells."""
+    return {col: ("category" if dtype == "category" else str) for col, dtype in schema.items()}
+
+
+def apply_schema(df, schema=MERGED_SCHEMA, name="rsi_data_merged", strict=False):
+    """Cast df to the declared schema and report values that do not fit it.
+
+    Numeric cells that are not numbers (or are out of range for year/month)
+    become missing and are counted, as are unknown frequencies and columns the
+    schema does not declare. Problems are printed, or raised as ValueError
+    with strict=True.
+    """
+    df = df.copy()
+    problems = []
+
+    extra = [col for col in df.columns if col not in schema]
+    if extra:
+        problems.append(f"undeclared columns {extra}")
+
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype == "category":
+            df[col] = df[col].astype("category")
+        elif dtype == "object":
+            df[col] = df[col].astype(object)
+        else:
+            raw = df[col]
+            numbers = pd.to_numeric(raw, errors="coerce")
+            bad = numbers.isna() & raw.notna() & (raw.astype(str).str.strip() != "")
+            if col in NUMERIC_RANGES:
+                low, high = NUMERIC_RANGES[col]
+                out_of_range = numbers.notna() & ((numbers < low) | (numbers > high) | (numbers % 1 != 0))
+                bad |= out_of_range
+                numbers = numbers.mask(out_of_range)
+            if bad.any():
+                problems.append(f"{col}: {int(bad.sum())} invalid values, e.g. {raw[bad].iloc[0]!r}")
+            df[col] = numbers.astype(dtype)
+
+    if "frequency" in df.columns:
+        unknown = set(df["frequency"].dropna().unique()) - FREQUENCIES
+        if unknown:
+            count = int(df["frequency"].isin(unknown).sum())
+            problems.append(f"frequency: {count} rows with {sorted(unknown)}")
+
+    for problem in problems:
+        if strict:
+            raise ValueError(f"{name} schema violation: {problem}")
+        print(f"⚠️ {name} schema: {problem}")
+    return df
+
+
+def read_merged_csv(path="cleansed/rsi_data_merged.csv", schema=MERGED_SCHEMA, name=None):
+    """Read the declared columns of a merged/cleaned RSI CSV straight into the schema."""
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {col: dtype for col, dtype in csv_dtypes(schema).items() if col in header}
+    df = pd.read_csv(path, usecols=list(dtypes), dtype=dtypes)
+    return apply_schema(df, schema, name=name or path)
+
+
+def memory_mb(df):
+    """Deep memory usage of a frame in MB."""
+    return df.memory_usage(deep=True).sum() / 1e6
@@ -1,34 +1,271 @@
 # run_all.py
 
-import subprocess
+import argparse
+import os
+import runpy
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
-# List of scripts in the order to execute
-scripts = [
-    "load_rsi_data_v2.py",
-    "clean_contents_v2.py",
-    "clean_notes.py",
-    "clean_dual_table_worksheet_v2.py",
-    "clean_multiheader_table.py",
-    "clean_table_3_4_v3.py",
-    "update_contents.py",
-    "prep_rpi_data.py",
-    "merge_agg_reference_v2.py",
-    "rerun_table_3_4.py",
-    "merge_rsi_data.py",
-    "table_name_clean.py",
-    "clean_table_5.py",
-    "clean_table_6.py"
+from artifact_cache import CACHE_DIR, ArtifactCache
+from run_manifest import MANIFEST_PATH, FileStats, append_records, measure, new_run_id
+
+WORKBOOK = "data/mainreferencetables.xlsx"
+SERIES_CSV = "data/series-*.csv"  # newest release, see load_rsi_data_v2.series_csv_path
+SHEET_CACHE = ".rsi_cache/sheets"
+
+# Scripts are resolved next to this file, so the pipeline can run with another
+# working directory (e.g. an ingest workspace holding a new release)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Every script with the files it reads and writes, in the order they used to
+# run one after another. The writes are also what the artifact cache stores
+# and restores, so every file a stage produces has to be listed.
+STAGES = [
+    {"script": "load_rsi_data_v2.py",
+     "reads": [WORKBOOK, SERIES_CSV],
+     "writes": [SHEET_CACHE]},
+    {"script": "clean_contents_v2.py",
+     "reads": [SHEET_CACHE],
+     "writes": ["cleansed/cleaned_contents.csv"]},
+    {"script": "clean_notes.py",
+     "reads": [SHEET_CACHE],
+     "writes": ["cleansed/cleaned_notes.csv"]},
+    {"script": "clean_dual_table_worksheet_v2.py",
+     "reads": [SHEET_CACHE],
+     "writes": ["cleansed/cleaned_dual_table_data.csv", "cleansed/agg_reference.csv"]},
+    {"script": "clean_multiheader_table.py",
+     "reads": [SHEET_CACHE],
+     "writes": ["cleansed/cleaned_multiheader_table_data.csv", "cleansed/agg_reference_extended.csv"]},
+    {"script": "clean_table_3_4_v3.py",
+     "reads": [SHEET_CACHE, "cleansed/agg_reference_extended.csv", "cleansed/agg_reference.csv",
+               "manual_agg_ref.txt"],
+     "writes": ["cleansed/cleaned_table_3_4_data_v3.csv", "cleansed/agg_reference_table_3_4.csv",
+                "cleansed/unmatched_table_3_4_log.csv", "cleansed/fuzzy_matches_table_3_4_log.csv"]},
+    {"script": "update_contents.py",
+     "reads": [SERIES_CSV, "cleansed/cleaned_contents.csv"],
+     "writes": ["cleansed/cleaned_contents.csv"]},
+    {"script": "prep_rpi_data.py",
+     "reads": [SERIES_CSV],
+     "writes": ["cleansed/cleaned_rpi_data.csv"]},
+    {"script": "merge_agg_reference_v2.py",
+     "reads": ["cleansed/agg_reference.csv", "cleansed/agg_reference_extended.csv",
+               "cleansed/agg_reference_table_3_4.csv", "manual_agg_ref.txt"],
+     "writes": ["cleansed/agg_reference_merged.csv", "cleansed/agg_reference_duplicates_log.csv",
+                "cleansed/archive/agg_reference.csv", "cleansed/archive/agg_reference_extended.csv",
+                "cleansed/archive/agg_reference_table_3_4.csv"]},
+    {"script": "merge_rsi_data.py",
+     "reads": ["cleansed/cleaned_dual_table_data.csv", "cleansed/cleaned_multiheader_table_data.csv",
+               "cleansed/cleaned_rpi_data.csv", "cleansed/cleaned_table_3_4_data_v3.csv"],
+     "writes": ["cleansed/rsi_data_merged.csv", "cleansed/rsi_data_merged_parquet",
+                "cleansed/archive/cleaned_dual_table_data.csv", "cleansed/archive/cleaned_multiheader_table_data.csv",
+                "cleansed/archive/cleaned_rpi_data.csv", "cleansed/archive/cleaned_table_3_4_data_v3.csv"]},
+    {"script": "table_name_clean.py",
+     "reads": ["cleansed/rsi_data_merged.csv"],
+     "writes": ["cleansed/clean_table_name.csv", "cleansed/rsi_data_merged.csv",
+                "cleansed/rsi_data_merged_parquet"]},
+    {"script": "star_schema.py",
+     "reads": ["cleansed/rsi_data_merged.csv", "cleansed/clean_table_name.csv", "cleansed/agg_reference_merged.csv",
+               "cleansed/cleaned_notes.csv", "cleansed/cleaned_contents.csv"],
+     "writes": ["cleansed/star"]},
+    {"script": "validate_frequency.py",
+     "reads": ["cleansed/rsi_data_merged.csv", "cleansed/agg_reference_merged.csv",
+               "cleansed/agg_reference_extended.csv"],
+     "writes": ["cleansed/frequency_discrepancies.csv"]},
+    {"script": "real_growth.py",
+     "reads": ["cleansed/rsi_data_merged.csv", "real_growth_map.txt"],
+     "writes": ["cleansed/real_growth.csv"]},
+    {"script": "anomaly.py",
+     "reads": ["cleansed/rsi_data_merged.csv"],
+     "writes": ["cleansed/anomalies.csv", "cleansed/anomaly_state.csv"]},
+    {"script": "clean_table_5.py",
+     "reads": [SHEET_CACHE],
+     "writes": ["cleansed/table_5_series.csv", "cleansed/table_5_observations.csv"]},
+    {"script": "clean_table_6.py",
+     "reads": [SHEET_CACHE],
+     "writes": ["cleansed/cleaned_table_6_data.csv"]},
+    {"script": "export_sqlite.py",
+     "reads": ["cleansed/rsi_data_merged.csv", "cleansed/agg_reference_merged.csv", "cleansed/clean_table_name.csv",
+               "cleansed/table_5_series.csv", "cleansed/table_5_observations.csv",
+               "cleansed/cleaned_table_6_data.csv", "cleansed/cleaned_notes.csv", "cleansed/cleaned_contents.csv"],
+     "writes": ["cleansed/rsi.sqlite"]},
 ]
-print("Running:", __file__)
-
-# Execute each script in order
-for script in scripts:
-    print(f"Running {script} ...")
-    result = subprocess.run(["python", script])
-    if result.returncode != 0:
-        print(f"Error running {script}. Exiting.")
-        sys.exit(result.returncode)
-    print(f"{script} completed successfully.\n")
-
-print("✅ All scripts executed successfully!")
+
+
+def build_graph(stages):
+    """Return {script: set of scripts it must wait for}.
+
+    Dependencies follow the declared order: a reader waits for the last
+    earlier writer of each file, and a writer waits for the last earlier
+    writer and for every reader of the previous version of that file.
+    """
+    deps = {stage["script"]: set() for stage in stages}
+    last_writer = {}
+    readers_since_write = {}
+
+    for stage in stages:
+        script = stage["script"]
+        for path in stage["reads"]:
+            if path in last_writer:
+                deps[script].add(last_writer[path])
+        for path in stage["writes"]:
+            if path in last_writer:
+                deps[script].add(last_writer[path])
+            deps[script].update(readers_since_write.get(path, ()))
+        for path in stage["reads"]:
+            readers_since_write.setdefault(path, []).append(script)
+        for path in stage["writes"]:
+            last_writer[path] = script
+            readers_since_write[path] = []
+        deps[script].discard(script)
+
+    return deps
+
+
+def upstream_stages(stages, target):
+    """Return the stages target depends on (directly or not), plus target, in declared order."""
+    deps = build_graph(stages)
+    needed = set()
+    todo = [target]
+    while todo:
+        script = todo.pop()
+        if script not in needed:
+            needed.add(script)
+            todo.extend(deps[script])
+    return [stage for stage in stages if stage["script"] in needed]
+
+
+def critical_path(stages, deps, durations):
+    """Return (total seconds, [scripts]) of the longest dependency chain."""
+    finish = {}
+    previous = {}
+    for stage in stages:
+        script = stage["script"]
+        parent = max(deps[script], key=lambda s: finish[s], default=None)
+        finish[script] = durations[script] + (finish[parent] if parent else 0.0)
+        previous[script] = parent
+
+    end = max(finish, key=finish.get)
+    path = []
+    while end:
+        path.append(end)
+        end = previous[end]
+    return finish[path[0]], path[::-1]
+
+
+def run_stage(script, profile=False, trace=False, run_id=None):
+    """Run one script inside the worker process and return its telemetry (wall, CPU, peak RSS)."""
+    path = os.path.join(SCRIPT_DIR, script)
+    sys.argv = [path]  # scripts with their own argparse must not see run_all's options
+    return measure(lambda: runpy.run_path(path, run_name="__main__"), profile=profile, trace=trace,
+                   label=os.path.splitext(script)[0], run_id=run_id)
+
+
+def run_pipeline(stages=STAGES, workers=None, manifest=MANIFEST_PATH, profile=None, trace=None,
+                 cache=CACHE_DIR, reuse=True):
+    """Run every stage as soon as the stages it depends on have finished.
+
+    Each finished stage appends one JSON line to manifest (None to skip):
+    its telemetry plus path, sha256, bytes and rows of every declared input
+    (taken when it starts) and output. profile/trace name one script to run
+    under cProfile/tracemalloc.
+
+    With an artifact cache folder (None to disable), a stage whose code,
+    local imports and input hashes match an earlier run gets its outputs
+    restored instead of running (reuse=False runs everything but still
+    refreshes the cache).
+    """
+    deps = build_graph(stages)
+    by_script = {stage["script"]: stage for stage in stages}
+    pending = {stage["script"] for stage in stages}
+    order = [stage["script"] for stage in stages]
+    done = set()
+    durations = {}
+    inputs = {}
+    keys = {}
+    stats = FileStats()
+    artifacts = ArtifactCache(cache, SCRIPT_DIR, stats) if cache else None
+    run_id = new_run_id()
+    start = time.perf_counter()
+
+    def finish(script, record):
+        durations[script] = record["wall_seconds"]
+        if manifest:
+            append_records([{"run_id": run_id, "stage": script, **record, "inputs": inputs[script],
+                             "outputs": stats.paths(by_script[script]["writes"])}], manifest)
+        done.add(script)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            ready = [s for s in order if s in pending and deps[s] <= done]
+            while ready:
+                script = ready.pop(0)
+                pending.discard(script)
+                stage = by_script[script]
+                if manifest or artifacts:
+                    inputs[script] = stats.paths(stage["reads"])
+                if artifacts:
+                    keys[script] = artifacts.key(stage, inputs[script])
+                    restore_start = time.perf_counter()
+                    if reuse and script not in (profile, trace) and artifacts.restore(keys[script], stage):
+                        finish(script, {"wall_seconds": round(time.perf_counter() - restore_start, 4),
+                                        "cached": True})
+                        print(f"♻️ {script} unchanged, outputs restored from the artifact cache.\n")
+                        ready = [s for s in order if s in pending and deps[s] <= done]
+                        continue
+                print(f"Running {script} ...")
+                running[pool.submit(run_stage, script, script == profile, script == trace, run_id)] = script
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                script = running.pop(future)
+                try:
+                    record = future.result()
+                except BaseException as exc:
+                    print(f"Error running {script}: {exc!r}. Exiting.")
+                    for other in running:
+                        other.cancel()
+                    sys.exit(1)
+                if artifacts:
+                    artifacts.store(keys[script], by_script[script])
+                finish(script, record)
+                print(f"{script} completed successfully in {durations[script]:.2f}s.\n")
+
+    total = time.perf_counter() - start
+    path_time, path = critical_path(stages, deps, durations)
+    print(f"⏱️ Wall time: {total:.2f}s (sum of stage times {sum(durations.values()):.2f}s)")
+    print(f"🧭 Critical path ({path_time:.2f}s): " + " -> ".join(path))
+    if manifest:
+        print(f"🧾 Run {run_id} recorded in {manifest}")
+    return durations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the RSI cleaning pipeline.")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="number of stages allowed to run at the same time")
+    parser.add_argument("--sheet-workers", type=int, default=None,
+                        help="processes each per-sheet parser may fan its sheets out to (RSI_SHEET_WORKERS)")
+    parser.add_argument("--profile", metavar="SCRIPT", help="run this stage under cProfile")
+    parser.add_argument("--tracemalloc", metavar="SCRIPT", help="trace this stage's allocations with tracemalloc")
+    parser.add_argument("--no-manifest", action="store_true", help=f"do not append to {MANIFEST_PATH}")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"run every stage even if {CACHE_DIR} has its outputs for the same code and inputs")
+    args = parser.parse_args(argv)
+    for script in (args.profile, args.tracemalloc):
+        if script and script not in {stage["script"] for stage in STAGES}:
+            parser.error(f"unknown stage '{script}'")
+    if args.sheet_workers is not None:
+        os.environ["RSI_SHEET_WORKERS"] = str(args.sheet_workers)
+
+    print("Running:", __file__)
+    run_pipeline(workers=args.workers, manifest=None if args.no_manifest else MANIFEST_PATH,
+                 profile=args.profile, trace=args.tracemalloc, reuse=not args.no_cache)
+    print("✅ All scripts executed successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# run_manifest.py
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+MANIFEST_PATH = ".rsi_cache/run_manifest.jsonl"
+PROFILE_DIR = ".rsi_cache/profiles"
+CHUNK_SIZE = 1 << 20
+
+
+def expand(path):
+    """Files and folders a declared stage path refers to (globs like data/series-*.csv expanded)."""
+    return sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+
+
+def _file_stats(path):
+    """sha256, size and data rows (lines after the header for CSV/text) of one file in one read."""
+    sha = hashlib.sha256()
+    lines = 0
+    last = b""
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    size = os.path.getsize(path)
+    rows = None
+    if path.endswith((".csv", ".txt")):
+        lines += 1 if size and last != b"\n" else 0
+        rows = max(lines - 1, 0)
+    elif path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+            rows = pq.ParquetFile(path).metadata.num_rows
+        except ImportError:
+            pass
+    return {"sha256": sha.hexdigest(), "bytes": size, "rows": rows}
+
+
+class FileStats:
+    """Hash/size/row counts of stage inputs and outputs, memoised on (size, mtime).
+
+    Many stages read the same files (every cleaner reads the sheet cache), so
+    each unchanged file is only read once per run.
+    """
+
+    def __init__(self):
+        self._memo = {}
+
+    def file(self, path):
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        if key not in self._memo:
+            self._memo[key] = _file_stats(path)
+        return self._memo[key]
+
+    def path(self, path):
+        """Stats of one file, or of a folder as a whole (hash over relative paths and file hashes)."""
+        if os.path.isfile(path):
+            return {"path": path, **self.file(path)}
+        if not os.path.isdir(path):
+            return {"path": path, "sha256": None, "bytes": 0, "rows": None}
+        sha = hashlib.sha256()
+        size, rows = 0, None
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                stats = self.file(full)
+                sha.update(os.path.relpath(full, path).encode() + b"\0" + stats["sha256"].encode())
+                size += stats["bytes"]
+                if stats["rows"] is not None:
+                    rows = (rows or 0) + stats["rows"]
+        return {"path": path, "sha256": sha.hexdigest(), "bytes": size, "rows": rows}
+
+    def paths(self, paths):
+        return [self.path(p) for declared in paths for p in expand(declared)]
+
+
+def reset_peak_rss():
+    """Reset this process's peak RSS (Linux VmHWM) so the next reading covers one stage only.
+
+    Returns False where that is not possible; the peak then includes
+    earlier stages run by the same worker process.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak RSS of this process in MB (VmHWM on Linux, ru_maxrss elsewhere), or None."""
+    try:
+        with open("/proc/self/status") as fh:
+            match = re.search(r"VmHWM:\s+(\d+)\s+kB", fh.read())
+        if match:
+            return int(match.group(1)) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def cpu_seconds():
+    """User + system CPU of this process and of its finished children (e.g. sheet pool workers)."""
+    try:
+        import resource
+    except ImportError:
+        return time.process_time()
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def measure(func, profile=False, trace=False, label="stage", run_id=None):
+    """Call func() and return its telemetry: wall, CPU, peak RSS and optional profiles.
+
+    With profile=True the call runs under cProfile, the stats are dumped to
+    PROFILE_DIR/<label>-<run_id>.prof and the top functions printed. With
+    trace=True tracemalloc records the peak traced memory and the top
+    allocation sites.
+    """
+    record = {}
+    profiler = None
+    if trace:
+        import tracemalloc
+        tracemalloc.start()
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    reset = reset_peak_rss()
+    cpu = cpu_seconds()
+    start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.runcall(func)
+        else:
+            func()
+    finally:
+        record["wall_seconds"] = round(time.perf_counter() - start, 4)
+        record["cpu_seconds"] = round(cpu_seconds() - cpu, 4)
+        peak = peak_rss_mb()
+        record["peak_rss_mb"] = round(peak, 1) if peak is not None else None
+        record["peak_rss_is_stage_only"] = reset
+
+        if profiler:
+            import pstats
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{label}-{run_id or 'run'}.prof")
+            profiler.dump_stats(path)
+            print(f"🔬 cProfile of {label} saved to: {path}")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+            record["profile_path"] = path
+        if trace:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            record["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+            tracemalloc.stop()
+            print(f"🧠 tracemalloc peak for {label}: {record['tracemalloc_peak_mb']} MB; top allocations:")
+            for stat in snapshot.statistics("lineno")[:10]:
+                print("  ", stat)
+    return record
+
+
+def new_run_id():
+    return time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+
+
+def append_records(records, path=MANIFEST_PATH):
+    """Append records as JSON lines."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as fh:
+        for record in records:
+            fh.write(json.dumps(record) + "\n")
+
+
+def read_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def compare_runs(records, run_id=None, baseline=None):
+    """Per-stage wall/CPU/peak RSS and rows out of one run next to an earlier run.
+
+    Defaults to the latest run against the one before it.
+    """
+    import pandas as pd
+
+    runs = list(dict.fromkeys(r["run_id"] for r in records))
+    if not runs:
+        return pd.DataFrame()
+    run_id = run_id or runs[-1]
+    if baseline is None:
+        earlier = runs[:runs.index(run_id)]
+        baseline = earlier[-1] if earlier else None
+
+    def summary(run):
+        rows = []
+        for r in records:
+            if r["run_id"] == run:
+                rows.append({"stage": r["stage"], "cached": r.get("cached", False),
+                             "wall_seconds": r["wall_seconds"], "cpu_seconds": r.get("cpu_seconds"),
+                             "peak_rss_mb": r.get("peak_rss_mb"),
+                             "rows_out": sum(o["rows"] or 0 for o in r["outputs"]),
+                             "bytes_out": sum(o["bytes"] for o in r["outputs"])})
+        return pd.DataFrame(rows).set_index("stage") if rows else pd.DataFrame()
+
+    current = summary(run_id)
+    if baseline is None:
+        return current
+    previous = summary(baseline)
+    out = current.join(previous, rsuffix="_before", how="left")
+    out["wall_change"] = out["wall_seconds"] / out["wall_seconds_before"] - 1
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show per-stage telemetry recorded by run_all.py.")
+    parser.add_argument("--run", help="run id to show (default: latest)")
+    parser.add_argument("--baseline", help="run id to compare with (default: the run before)")
+    parser.add_argument("--list", action="store_true", help="list recorded runs")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    args = parser.parse_args()
+
+    records = read_manifest(args.manifest)
+    if not records:
+        print("No runs recorded in", args.manifest)
+        return
+    if args.list:
+        for run in dict.fromkeys(r["run_id"] for r in records):
+            stages = [r for r in records if r["run_id"] == run]
+            print(f"{run}: {len(stages)} stages, {sum(r['wall_seconds'] for r in stages):.2f}s stage time")
+        return
+    print(compare_runs(records, args.run, args.baseline).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# series_store.py
+
+import numpy as np
+import pandas as pd
+
+from rsi_schema import read_merged_csv
+
+MERGED_CSV = "cleansed/rsi_data_merged.csv"
+
+# Index key, most selective column first
+KEY_COLS = ["dataset_code", "agg_sic_code", "sheet_name", "table_code", "frequency"]
+
+
+def normalise_key(values):
+    """Upper-case and strip key values; missing values become ''."""
+    return pd.Series(values, dtype=object).fillna("").astype(str).str.strip().str.upper()
+
+
+class SeriesStore:
+    """Series lookups over the merged RSI data without scanning the frame.
+
+    The frame is sorted once by (dataset_code, agg_sic_code, sheet_name,
+    table_code, frequency). Each key column is normalised (strip + upper) and
+    encoded as its rank among the sorted distinct values, and the five ranks
+    are packed into one int64, so every series is a contiguous block of rows
+    and get_series() is a binary search on that array. Rows inside a series
+    keep their original (chronological) order.
+    """
+
+    def __init__(self, df, key_cols=KEY_COLS):
+        self.key_cols = list(key_cols)
+        self._categories = []
+        codes = []
+        for col in self.key_cols:
+            keys = normalise_key(df[col] if col in df.columns else [""] * len(df))
+            categories = np.sort(keys.unique())
+            self._categories.append(pd.Index(categories))
+            codes.append(np.searchsorted(categories, keys.to_numpy()))
+
+        # Mixed-radix packing keeps the lexicographic order of the key tuple
+        self._radix = [len(c) for c in self._categories]
+        if np.prod([float(r) for r in self._radix]) >= 2 ** 62:
+            raise ValueError("Too many distinct key values to pack into an int64 key")
+        packed = np.zeros(len(df), dtype=np.int64)
+        for code, radix in zip(codes, self._radix):
+            packed = packed * radix + code
+
+        order = np.argsort(packed, kind="stable")
+        self.data = df.iloc[order].reset_index(drop=True)
+        self._keys = packed[order]
+
+    @classmethod
+    def from_csv(cls, path=MERGED_CSV, **kwargs):
+        return cls(read_merged_csv(path), **kwargs)
+
+    def __len__(self):
+        return len(self.data)
+
+    def _bounds(self, values):
+        """Return the (low, high) packed-key range for a key prefix."""
+        low = high = 0
+        for i, radix in enumerate(self._radix):
+            if i < len(values):
+                low = low * radix + values[i]
+                high = high * radix + values[i]
+            else:
+                low = low * radix
+                high = high * radix + radix - 1
+        return low, high
+
+    def get_series(self, dataset_code=None, agg_sic_code=None, sheet_name=None, table_code=None,
+                   frequency=None):
+        """Return the rows of one series (or of every series matching the given fields).
+
+        Matching is case- and whitespace-insensitive. Fields given as a prefix of
+        the key order are resolved by binary search; any later field left as
+        None matches everything, and fields after such a gap are checked only
+        within the rows already narrowed down.
+        """
+        wanted = dict(zip(KEY_COLS, [dataset_code, agg_sic_code, sheet_name, table_code, frequency]))
+        codes = []
+        for col, categories in zip(self.key_cols, self._categories):
+            value = wanted.get(col)
+            if value is None:
+                codes.append(None)
+                continue
+            pos = categories.get_indexer([str(value).strip().upper()])[0]
+            if pos < 0:
+                return self.data.iloc[0:0]
+            codes.append(int(pos))
+
+        prefix = []
+        for code in codes:
+            if code is None:
+                break
+            prefix.append(code)
+        low, high = self._bounds(prefix)
+        start = np.searchsorted(self._keys, low, side="left")
+        stop = np.searchsorted(self._keys, high, side="right")
+        rows = self.data.iloc[start:stop]
+
+        rest = [(i, code) for i, code in enumerate(codes) if i >= len(prefix) and code is not None]
+        if rest:
+            keys = self._keys[start:stop]
+            mask = np.ones(len(keys), dtype=bool)
+            for i, code in rest:
+                divisor = int(np.prod(self._radix[i + 1:], dtype=np.int64))
+                mask &= (keys // divisor) % self._radix[i] == code
+            rows = rows[mask]
+        return rows
+
+    def series_index(self):
+        """Return one row per series with its key values and [start, stop) row range."""
+        starts = np.flatnonzero(np.r_[True, self._keys[1:] != self._keys[:-1]])
+        stops = np.r_[starts[1:], len(self._keys)]
+        index = self.data.iloc[starts][[c for c in self.key_cols if c in self.data.columns]].reset_index(drop=True)
+        index["start"] = starts
+        index["stop"] = stops
+        return index
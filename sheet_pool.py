@@ -0,0 +1,40 @@
+# sheet_pool.py
+
+import importlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+
+def sheet_workers():
+    """Number of processes per-sheet parsers may use (RSI_SHEET_WORKERS, default 1)."""
+    return max(1, int(os.environ.get("RSI_SHEET_WORKERS", "1")))
+
+
+def _call(module_name, func_name, sheet_name, args):
+    func = getattr(importlib.import_module(module_name), func_name)
+    return func(sheet_name, *args)
+
+
+def map_sheets(module_name, func_name, sheet_names, *args, workers=None):
+    """Run module_name.func_name(sheet_name, *args) for every sheet.
+
+    The function is looked up by module name so worker processes can import
+    it whether the caller runs as a script or inside run_all. Results come
+    back in the order of sheet_names (workbook order), however many workers
+    run, so callers can merge them deterministically.
+    """
+    workers = sheet_workers() if workers is None else workers
+    sheet_names = list(sheet_names)
+    if workers <= 1 or len(sheet_names) <= 1:
+        return [_call(module_name, func_name, sheet_name, args) for sheet_name in sheet_names]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(sheet_names))) as pool:
+        return list(pool.map(_call, repeat(module_name), repeat(func_name), sheet_names, repeat(args)))
+
+
+def merge_first_seen(target, partial):
+    """Add partial's keys to target, keeping the value already there (first writer wins)."""
+    for key, value in partial.items():
+        target.setdefault(key, value)
+    return target
@@ -0,0 +1,154 @@
+# star_schema.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from rsi_period import parse_periods, period_to_timestamp
+from rsi_schema import read_merged_csv
+from series_store import normalise_key
+
+MERGED_CSV = "cleansed/rsi_data_merged.csv"
+TABLE_NAMES_PATH = "cleansed/clean_table_name.csv"
+REFERENCE_PATH = "cleansed/agg_reference_merged.csv"
+NOTES_PATH = "cleansed/cleaned_notes.csv"
+CONTENTS_PATH = "cleansed/cleaned_contents.csv"
+STAR_DIR = "cleansed/star"
+
+# Key 0 is the "not applicable" member of every dimension (e.g. the RPI series
+# has no table_code or agg_sic_code), so fact keys are never null
+UNKNOWN = "(none)"
+
+FACT_KEYS = {"sheet_key": "int16", "table_key": "int16", "agg_sic_key": "int16",
+             "dataset_key": "int32", "period_id": "int32"}
+
+
+def _read_optional(path, **kwargs):
+    return pd.read_csv(path, dtype=str, **kwargs).fillna("") if os.path.exists(path) else pd.DataFrame()
+
+
+def dense_keys(values, name):
+    """Dimension of sorted distinct values with keys 1..n (0 for missing) and the key of each value.
+
+    Returns (dimension frame, codes aligned with values).
+    """
+    values = pd.Series(values, dtype=object).fillna("").astype(str).str.strip().to_numpy()
+    uniques, codes = np.unique(values, return_inverse=True)
+    keys = np.arange(len(uniques))
+    if len(uniques) and uniques[0] == "":
+        uniques = uniques[1:]
+    else:
+        keys = keys + 1
+    dimension = pd.DataFrame({f"{name}_key": np.arange(len(uniques) + 1), name: [UNKNOWN] + list(uniques)})
+    return dimension, keys[codes]
+
+
+def period_dimension(df):
+    """One row per (frequency, period_key) with a dense period_id and calendar attributes."""
+    periods = df[["frequency", "period_key", "date"]].astype({"frequency": object, "date": object})
+    periods = periods.dropna(subset=["period_key"]).drop_duplicates(["frequency", "period_key"])
+    periods = periods.sort_values(["frequency", "period_key"], kind="stable").reset_index(drop=True)
+    parsed = parse_periods(periods["date"])
+    dimension = pd.DataFrame({
+        "period_id": np.arange(1, len(periods) + 1),
+        "frequency": periods["frequency"].to_numpy(),
+        "period_key": periods["period_key"].astype("int32").to_numpy(),
+        "date": periods["date"].to_numpy(),
+        "year": parsed["year"].to_numpy(),
+        "quarter": parsed["quarter"].to_numpy(),
+        "month": parsed["month"].to_numpy(),
+        "period_start": period_to_timestamp(parsed).dt.date.to_numpy(),
+    })
+    unknown = pd.DataFrame({"period_id": [0], "frequency": [UNKNOWN], "date": [UNKNOWN]})
+    return pd.concat([unknown, dimension], ignore_index=True).astype(
+        {"period_key": "Int32", "year": "Int16", "quarter": "Int8", "month": "Int8"})
+
+
+def build_star(df, table_names=None, reference=None, notes=None, contents=None):
+    """Split the merged frame into dimension tables with dense int keys and an int-only fact table.
+
+    Returns {name: frame} with dim_sheet, dim_table, dim_agg_sic, dim_dataset,
+    dim_period, dim_note and fact_observation (FACT_KEYS + value).
+    """
+    table_names = table_names if table_names is not None else pd.DataFrame(columns=["table_name", "table_code"])
+    reference = reference if reference is not None else pd.DataFrame(columns=["agg_sic_code"])
+    notes = notes if notes is not None else pd.DataFrame(columns=["note_number", "note_text"])
+    contents = contents if contents is not None else pd.DataFrame(columns=["worksheet_number", "worksheet_description"])
+
+    dim_sheet, sheet_key = dense_keys(df["sheet_name"], "sheet_name")
+    dim_sheet = dim_sheet.rename(columns={"sheet_name_key": "sheet_key"}).merge(
+        contents.rename(columns={"worksheet_number": "sheet_name", "worksheet_description": "sheet_description"}),
+        on="sheet_name", how="left")
+
+    # Table codes are initials, so names such as "Index number(s) of sales per
+    # week" share one; table_key is the table's identity and every name is kept
+    dim_table, table_key = dense_keys(df["table_code"], "table_code")
+    names = table_names.drop_duplicates().groupby("table_code", sort=False)["table_name"].agg("; ".join)
+    dim_table = dim_table.rename(columns={"table_code_key": "table_key"}).merge(
+        names.reset_index(), on="table_code", how="left")
+
+    dim_agg, agg_key = dense_keys(normalise_key(df["agg_sic_code"]).replace("", np.nan), "agg_sic_code")
+    reference = reference.assign(agg_sic_code=normalise_key(reference["agg_sic_code"]).to_numpy())
+    dim_agg = dim_agg.rename(columns={"agg_sic_code_key": "agg_sic_key"}).merge(
+        reference.drop_duplicates("agg_sic_code"), on="agg_sic_code", how="left")
+
+    dim_dataset, dataset_key = dense_keys(df["dataset_code"], "dataset_code")
+    dim_dataset = dim_dataset.rename(columns={"dataset_code_key": "dataset_key"})
+
+    note_refs = pd.concat([notes.get("note_number", pd.Series(dtype=str)),
+                           dim_agg.get("note_ref", pd.Series(dtype=str))]).str.strip().replace("", np.nan)
+    dim_note, _ = dense_keys(note_refs.dropna(), "note_ref")
+    dim_note = dim_note.rename(columns={"note_ref_key": "note_key"}).merge(
+        notes.rename(columns={"note_number": "note_ref"}).drop_duplicates("note_ref"), on="note_ref", how="left")
+    if "note_ref" in dim_agg.columns:
+        dim_agg["note_key"] = dim_agg["note_ref"].fillna("").str.strip().map(
+            dim_note.set_index("note_ref")["note_key"]).fillna(0).astype("int16")
+
+    dim_period = period_dimension(df)
+    lookup = pd.MultiIndex.from_frame(dim_period[["frequency", "period_key"]].iloc[1:].astype(
+        {"period_key": "int64"}))
+    period_pos = lookup.get_indexer(pd.MultiIndex.from_arrays(
+        [df["frequency"].astype(object), df["period_key"].astype("Float64").fillna(-1).astype("int64")]))
+    period_id = np.where(period_pos >= 0, period_pos + 1, 0)
+
+    fact = pd.DataFrame({"sheet_key": sheet_key, "table_key": table_key, "agg_sic_key": agg_key,
+                         "dataset_key": dataset_key, "period_id": period_id}).astype(FACT_KEYS)
+    fact["value"] = df["value"].to_numpy(dtype=float)
+
+    return {"dim_sheet": dim_sheet, "dim_table": dim_table, "dim_agg_sic": dim_agg, "dim_dataset": dim_dataset,
+            "dim_period": dim_period, "dim_note": dim_note, "fact_observation": fact}
+
+
+def write_star(tables, path=STAR_DIR):
+    """Write every table as CSV, plus fact_observation.parquet when pyarrow is installed."""
+    os.makedirs(path, exist_ok=True)
+    for name, table in tables.items():
+        table.to_csv(os.path.join(path, f"{name}.csv"), index=False)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("⚠️ pyarrow not installed, skipped Parquet output:", os.path.join(path, "fact_observation.parquet"))
+        return
+    tables["fact_observation"].to_parquet(os.path.join(path, "fact_observation.parquet"), index=False)
+
+
+def main():
+    df = read_merged_csv(MERGED_CSV)
+    tables = build_star(df, _read_optional(TABLE_NAMES_PATH), _read_optional(REFERENCE_PATH),
+                        _read_optional(NOTES_PATH), _read_optional(CONTENTS_PATH))
+    write_star(tables)
+
+    fact = tables["fact_observation"]
+    duplicates = fact.duplicated(list(FACT_KEYS)).sum()
+    if duplicates:
+        print(f"⚠️ {duplicates} fact rows share all keys with another row")
+    fact_mb = os.path.getsize(os.path.join(STAR_DIR, "fact_observation.csv")) / 2 ** 20
+    merged_mb = os.path.getsize(MERGED_CSV) / 2 ** 20
+    print("⭐ " + ", ".join(f"{name} {len(table):,}" for name, table in tables.items()))
+    print(f"📉 fact_observation.csv {fact_mb:.2f} MB vs rsi_data_merged.csv {merged_mb:.2f} MB")
+    print("✅ Saved star schema to:", STAR_DIR)
+
+
+if __name__ == "__main__":
+    main()
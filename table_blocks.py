@@ -0,0 +1,59 @@
+# table_blocks.py
+
+import numpy as np
+import pandas as pd
+
+
+def extract_block(df_data, column_mappings, order="row"):
+    """Turn one table's data block into long format in a single pass.
+
+    df_data is the raw block (dates in column 0, one column per series) and
+    column_mappings is a list of dicts, each with the "col_index" of a series
+    column plus the fields to copy onto every observation of that column.
+
+    Every mapped cell is converted with pd.to_numeric at once; cells that are
+    not numbers, or whose date is missing, are dropped. The result has one row
+    per remaining cell with the mapping fields, "date" (stripped) and "value".
+    order="row" lists observations date by date (row-major), order="column"
+    lists them series by series, matching the order the cleaners always used.
+    """
+    mappings = pd.DataFrame(column_mappings)
+    if df_data.empty or mappings.empty:
+        return pd.DataFrame()
+
+    n_rows, n_cols = len(df_data), len(mappings)
+    cells = df_data.iloc[:, mappings["col_index"].to_numpy()].to_numpy(dtype=object)
+    if order == "row":
+        cells = cells.ravel(order="C")
+        row_idx = np.repeat(np.arange(n_rows), n_cols)
+        col_idx = np.tile(np.arange(n_cols), n_rows)
+    elif order == "column":
+        cells = cells.ravel(order="F")
+        row_idx = np.tile(np.arange(n_rows), n_cols)
+        col_idx = np.repeat(np.arange(n_cols), n_rows)
+    else:
+        raise ValueError(f"Unknown order '{order}', expected 'row' or 'column'")
+
+    values = pd.to_numeric(pd.Series(cells, dtype=object), errors="coerce").to_numpy(dtype=float)
+    dates = df_data.iloc[:, 0]
+    keep = ~np.isnan(values) & dates.notna().to_numpy()[row_idx]
+
+    block = mappings.drop(columns="col_index").iloc[col_idx[keep]].reset_index(drop=True)
+    block["date"] = dates.iloc[row_idx[keep]].astype(str).str.strip().to_numpy()
+    block["value"] = values[keep]
+    return block
+
+
+def concat_blocks(blocks):
+    """Stack extracted blocks, or return an empty frame when nothing was found."""
+    blocks = [block for block in blocks if not block.empty]
+    return pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame()
+
+
+def find_rows(df_raw, text):
+    """Return the index of every row with a cell containing text (any case)."""
+    cells = df_raw.fillna('').astype(str)
+    mask = np.zeros(len(df_raw), dtype=bool)
+    for col in cells.columns:
+        mask |= cells[col].str.contains(text, case=False, regex=False).to_numpy()
+    return df_raw.index[mask].tolist()
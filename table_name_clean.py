@@ -2,59 +2,69 @@
 
 import pandas as pd
 import os
+from rsi_parquet import save_merged
+from rsi_schema import apply_schema, read_merged_csv
 
-# Ensure the 'cleansed' folder exists
-os.makedirs("cleansed", exist_ok=True)
 
-# Define file paths
-merged_csv_path = "cleansed/rsi_data_merged.csv"
-clean_table_name_path = "cleansed/clean_table_name.csv"
+# Function to create a table code by taking the first letter of each word in the table name
+def create_table_code(name):
+    return ''.join(word[0].upper() for word in name.split())
 
-# Read the merged RSI data
-df = pd.read_csv(merged_csv_path, dtype=str)
 
-# Get unique table names from the 'table_name' column (dropping any NaN)
-unique_table_names = df['table_name'].dropna().unique()
+def main():
+    # Ensure the 'cleansed' folder exists
+    os.makedirs("cleansed", exist_ok=True)
 
-# Create a DataFrame with the unique table names
-table_names_df = pd.DataFrame(unique_table_names, columns=['table_name'])
+    # Define file paths
+    merged_csv_path = "cleansed/rsi_data_merged.csv"
+    clean_table_name_path = "cleansed/clean_table_name.csv"
 
-# Define the unwanted table name text (to be removed)
-unwanted_text = "Some cells in this table are empty because data was not collected for these variables at these time points."
+    # Read the merged RSI data
+    df = read_merged_csv(merged_csv_path)
 
-# Remove the unwanted row from the unique table names
-table_names_df = table_names_df[table_names_df['table_name'] != unwanted_text].copy()
+    # Get unique table names from the 'table_name' column (dropping any NaN)
+    unique_table_names = df['table_name'].dropna().unique()
 
-# Function to create a table code by taking the first letter of each word in the table name
-def create_table_code(name):
-    return ''.join(word[0].upper() for word in name.split())
+    # Create a DataFrame with the unique table names
+    table_names_df = pd.DataFrame(unique_table_names, columns=['table_name'])
+
+    # Define the unwanted table name text (to be removed)
+    unwanted_text = "Some cells in this table are empty because data was not collected for these variables at these time points."
+
+    # Remove the unwanted row from the unique table names
+    table_names_df = table_names_df[table_names_df['table_name'] != unwanted_text].copy()
+
+    # Apply the function to create a new 'table_code' column
+    table_names_df['table_code'] = table_names_df['table_name'].apply(create_table_code)
+
+    # Save the unique table names mapping to a CSV file
+    table_names_df.to_csv(clean_table_name_path, index=False)
+    print("Saved unique table names mapping to:", clean_table_name_path)
 
-# Apply the function to create a new 'table_code' column
-table_names_df['table_code'] = table_names_df['table_name'].apply(create_table_code)
+    # --- Now update the main merged data ---
 
-# Save the unique table names mapping to a CSV file
-table_names_df.to_csv(clean_table_name_path, index=False)
-print("Saved unique table names mapping to:", clean_table_name_path)
+    # Remove rows where table_name is the unwanted text
+    df_clean = df[df['table_name'] != unwanted_text].copy()
 
-# --- Now update the main merged data ---
+    # Create a dictionary mapping from table_name to table_code
+    table_code_dict = table_names_df.set_index('table_name')['table_code'].to_dict()
 
-# Remove rows where table_name is the unwanted text
-df_clean = df[df['table_name'] != unwanted_text].copy()
+    # Map the table_code to the main data based on table_name
+    df_clean['table_code'] = df_clean['table_name'].map(table_code_dict)
 
-# Create a dictionary mapping from table_name to table_code
-table_code_dict = table_names_df.set_index('table_name')['table_code'].to_dict()
+    # Create a unique identifier (uid) as "sheet_name-table_code-date"
+    # Ensure that sheet_name, table_code, and date are strings
+    df_clean['uid'] = df_clean['sheet_name'].astype(str) + "-" + df_clean['table_code'].astype(str) + "-" + df_clean['date'].astype(str)
 
-# Map the table_code to the main data based on table_name
-df_clean['table_code'] = df_clean['table_name'].map(table_code_dict)
+    # Remove the 'table_name' column before saving
+    df_clean.drop(columns=["table_name"], inplace=True)
+    df_clean = apply_schema(df_clean)
 
-# Create a unique identifier (uid) as "sheet_name-table_code-date"
-# Ensure that sheet_name, table_code, and date are strings
-df_clean['uid'] = df_clean['sheet_name'].astype(str) + "-" + df_clean['table_code'].astype(str) + "-" + df_clean['date'].astype(str)
+    # Save the updated merged data back to the same CSV file (or a new one if preferred)
+    updated_csv_path = "cleansed/rsi_data_merged.csv"
+    save_merged(df_clean, csv_path=updated_csv_path)
+    print("Updated merged data saved to:", updated_csv_path)
 
-# Remove the 'table_name' column before saving
-df_clean.drop(columns=["table_name"], inplace=True)
 
-# Save the updated merged data back to the same CSV file (or a new one if preferred)
-updated_csv_path = "cleansed/rsi_data_merged.csv"
-df_clean.to_csv(updated_csv_path, index=False)
-print("Updated merged data saved to:", updated_csv_path)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# validate_frequency.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from rsi_schema import read_merged_csv
+from series_store import normalise_key
+
+MERGED_CSV = "cleansed/rsi_data_merged.csv"
+REFERENCE_PATH = "cleansed/agg_reference_merged.csv"
+# percentage_weight is only published on the Table 1/2 headers (agg_reference_extended.csv)
+WEIGHT_PATHS = ["cleansed/agg_reference_extended.csv"]
+REPORT_PATH = "cleansed/frequency_discrepancies.csv"
+
+# "Table N M/Q/A" sheets publish the same series at three frequencies
+SHEET_PATTERN = r"^(Table \d+) [MQA]$"
+SERIES_KEY = ["table", "dataset_code", "agg_sic_code"]
+
+# Published values are rounded (usually to 1 dp), so the mean of rounded
+# months can differ from the rounded quarter/year by up to one unit of rounding
+ABS_TOLERANCE = 0.1
+REL_TOLERANCE = 0.001
+WEIGHT_TOLERANCE = 0.1
+
+MONTHS_PER_PERIOD = {"quarterly": 3, "annual": 12}
+
+REPORT_COLS = ["check", "sheet_name", "table_code", "dataset_code", "agg_sic_code", "date", "period_key",
+               "published", "expected", "difference"]
+
+
+def table_observations(df):
+    """Observations of the Table N M/Q/A sheets with their table ("Table N") and normalised keys."""
+    table = df["sheet_name"].astype(str).str.extract(SHEET_PATTERN, expand=False)
+    obs = df[table.notna().to_numpy()].dropna(subset=["value", "period_key"])
+    obs = obs[["sheet_name", "table_code", "dataset_code", "agg_sic_code", "frequency", "date", "period_key",
+               "value"]].astype({"sheet_name": object, "table_code": object, "frequency": object, "date": object})
+    obs["table"] = table[obs.index].to_numpy()
+    obs["dataset_code"] = normalise_key(obs["dataset_code"]).to_numpy()
+    obs["agg_sic_code"] = normalise_key(obs["agg_sic_code"]).to_numpy()
+    obs["period_key"] = obs["period_key"].to_numpy(dtype=np.int64)
+    return obs
+
+
+def aggregate_monthly(obs):
+    """Mean of the monthly values over complete quarters and years, for every series at once.
+
+    Returns SERIES_KEY, frequency, period_key (the quarter/year key of
+    rsi_period: yyyy03..yyyy12 and yyyy12) and expected.
+    """
+    monthly = obs[obs["frequency"] == "monthly"]
+    series = monthly.groupby(SERIES_KEY, sort=False).ngroup().to_numpy()
+    key = monthly["period_key"].to_numpy()
+    value = monthly["value"].to_numpy(dtype=float)
+
+    periods = []
+    for frequency, period_key in [("quarterly", key // 100 * 100 + ((key % 100 - 1) // 3 + 1) * 3),
+                                  ("annual", key // 100 * 100 + 12)]:
+        # One integer per (series, period); reductions are bincounts over its codes
+        codes, groups = pd.factorize(series.astype(np.int64) * 1_000_000 + period_key)
+        count = np.bincount(codes, minlength=len(groups))
+        total = np.bincount(codes, weights=value, minlength=len(groups))
+        complete = count == MONTHS_PER_PERIOD[frequency]
+        first = np.unique(codes, return_index=True)[1]
+        aggregated = monthly.iloc[first[complete]][SERIES_KEY].reset_index(drop=True)
+        aggregated["frequency"] = frequency
+        aggregated["period_key"] = groups[complete] % 1_000_000
+        aggregated["expected"] = total[complete] / count[complete]
+        periods.append(aggregated)
+    return pd.concat(periods, ignore_index=True)
+
+
+def check_frequencies(obs, abs_tol=ABS_TOLERANCE, rel_tol=REL_TOLERANCE):
+    """Published quarterly/annual values against the mean of the monthly values.
+
+    Returns (discrepancies, number of values compared).
+    """
+    published = obs[obs["frequency"].isin(list(MONTHS_PER_PERIOD))]
+    compared = published.merge(aggregate_monthly(obs), on=SERIES_KEY + ["frequency", "period_key"])
+    compared["difference"] = compared["value"] - compared["expected"]
+    limit = np.maximum(abs_tol, rel_tol * compared["value"].abs())
+    bad = compared[compared["difference"].abs() > limit]
+    report = bad.rename(columns={"value": "published"}).assign(check=bad["frequency"] + " vs monthly mean")
+    return report.reindex(columns=REPORT_COLS), len(compared)
+
+
+def load_weights(reference_path=REFERENCE_PATH, weight_paths=WEIGHT_PATHS):
+    """percentage_weight per agg_sic_code from the merged reference, filled from agg_reference_extended."""
+    frames = [pd.read_csv(path, dtype=str) for path in [reference_path] + weight_paths if os.path.exists(path)]
+    if not frames:
+        return pd.Series(dtype=float)
+    reference = pd.concat([f.reindex(columns=["agg_sic_code", "percentage_weight"]) for f in frames])
+    weight = pd.to_numeric(reference["percentage_weight"].str.replace("%", "", regex=False).str.strip(),
+                           errors="coerce")
+    reference = reference.assign(agg_sic_code=normalise_key(reference["agg_sic_code"]).to_numpy(),
+                                 percentage_weight=weight.to_numpy()).dropna(subset=["percentage_weight"])
+    return reference.drop_duplicates("agg_sic_code").set_index("agg_sic_code")["percentage_weight"]
+
+
+def check_weights(obs, weights, tol=WEIGHT_TOLERANCE):
+    """percentage_weight summed over the agg_sic_codes of each published table should be 100."""
+    series = obs[["sheet_name", "table_code", "agg_sic_code"]].drop_duplicates()
+    series = series.assign(weight=series["agg_sic_code"].map(weights)).dropna(subset=["weight"])
+    totals = series.groupby(["sheet_name", "table_code"], dropna=False)["weight"].sum().reset_index()
+    totals["difference"] = totals["weight"] - 100.0
+    bad = totals[totals["difference"].abs() > tol]
+    report = bad.rename(columns={"weight": "published"}).assign(check="percentage_weight total", expected=100.0)
+    return report.reindex(columns=REPORT_COLS), len(totals)
+
+
+def main():
+    obs = table_observations(read_merged_csv(MERGED_CSV))
+    frequency_report, compared = check_frequencies(obs)
+    weight_report, tables = check_weights(obs, load_weights())
+
+    report = pd.concat([frequency_report, weight_report], ignore_index=True)
+    report = report.sort_values(["check", "sheet_name", "dataset_code", "period_key"], kind="stable")
+    report = report.astype({"period_key": "Int32"}).round({"expected": 4, "difference": 4})
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    report.to_csv(REPORT_PATH, index=False)
+
+    print(f"🔁 {len(frequency_report)} of {compared} quarterly/annual values differ from the monthly mean "
+          f"by more than {ABS_TOLERANCE} / {REL_TOLERANCE:.1%}")
+    print(f"⚖️ {len(weight_report)} of {tables} tables with percentage weights do not sum to 100")
+    print("✅ Saved:", REPORT_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# vintage_store.py
+
+import argparse
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from series_store import normalise_key
+
+VINTAGE_DIR = "cleansed/vintages"
+MANIFEST = "manifest.json"
+
+# Same observation key as ingest.DIFF_KEY
+KEY_COLS = ["sheet_name", "dataset_code", "agg_sic_code", "frequency", "period_key"]
+DELTA_COLS = ["change_type"] + KEY_COLS + ["date", "value"]
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+class VintageStore:
+    """Every release of rsi_data_merged kept as a delta against the one before.
+
+    The first vintage holds the whole store (all rows "inserted"); each later
+    one only the inserted, revised and deleted observations of that release,
+    as written by ingest.py. Vintages are keyed by the series CSV's Release
+    date and stored as one Parquet file each (CSV without pyarrow), listed in
+    manifest.json in release order.
+    """
+
+    def __init__(self, path=VINTAGE_DIR):
+        self.path = path
+        manifest = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest) as fh:
+                self.releases = json.load(fh)["releases"]
+        else:
+            self.releases = []
+
+    def __len__(self):
+        return len(self.releases)
+
+    def release_dates(self):
+        return [_as_date(entry["release_date"]) for entry in self.releases]
+
+    def add_release(self, release_date, changes, replace=False):
+        """Record one release from its change frame (change_type, key columns, date, value).
+
+        Recording the latest release again raises ValueError unless replace=True;
+        changes must then be the delta against the vintage before it.
+        """
+        release_date = _as_date(release_date)
+        dates = self.release_dates()
+        if dates and release_date < dates[-1]:
+            raise ValueError(f"Release {release_date} is older than the latest vintage {dates[-1]}")
+        if dates and release_date == dates[-1]:
+            if not replace:
+                raise ValueError(f"Vintage {release_date} is already recorded; replace it explicitly")
+            self.releases.pop()
+
+        delta = changes[DELTA_COLS].reset_index(drop=True)
+        os.makedirs(self.path, exist_ok=True)
+        try:
+            import pyarrow  # noqa: F401
+            file_name = f"{release_date.isoformat()}.parquet"
+            delta.to_parquet(os.path.join(self.path, file_name), index=False)
+        except ImportError:
+            file_name = f"{release_date.isoformat()}.csv"
+            delta.to_csv(os.path.join(self.path, file_name), index=False)
+
+        counts = delta["change_type"].value_counts()
+        self.releases.append({
+            "release_date": release_date.isoformat(),
+            "file": file_name,
+            "rows": len(delta),
+            **{kind: int(counts.get(kind, 0)) for kind in ("inserted", "revised", "deleted")},
+        })
+        with open(os.path.join(self.path, MANIFEST), "w") as fh:
+            json.dump({"releases": self.releases}, fh, indent=2)
+
+    def add_snapshot(self, release_date, df):
+        """Record a full merged frame as the first (baseline) vintage."""
+        delta = df.reindex(columns=KEY_COLS + ["date", "value"]).copy()
+        delta.insert(0, "change_type", "inserted")
+        self.add_release(release_date, delta)
+
+    def _deltas(self, until=None, **filters):
+        """Concatenate the (filtered) deltas up to a release date, in release order."""
+        until = _as_date(until) if until is not None else None
+        wanted = {col: str(value).strip().upper() for col, value in filters.items() if value is not None}
+        unknown = set(wanted) - set(KEY_COLS)
+        if unknown:
+            raise ValueError(f"Unknown key columns: {sorted(unknown)}")
+
+        frames = []
+        for entry in self.releases:
+            if until is not None and _as_date(entry["release_date"]) > until:
+                break
+            file_path = os.path.join(self.path, entry["file"])
+            delta = pd.read_parquet(file_path) if file_path.endswith(".parquet") else pd.read_csv(file_path)
+            mask = np.ones(len(delta), dtype=bool)
+            for col, value in wanted.items():
+                mask &= (normalise_key(delta[col]) == value).to_numpy()
+            delta = delta[mask].assign(period_key=pd.to_numeric(delta["period_key"][mask]).astype("Int32"))
+            for col in delta.columns:
+                if isinstance(delta[col].dtype, pd.CategoricalDtype):
+                    delta[col] = delta[col].astype(object)
+            frames.append(delta.assign(release_date=entry["release_date"]))
+        if not frames:
+            return pd.DataFrame(columns=DELTA_COLS + ["release_date"])
+        return pd.concat(frames, ignore_index=True)
+
+    def as_of(self, release_date, **filters):
+        """Observations as published on release_date, optionally filtered on key columns.
+
+        e.g. store.as_of("2025-02-19", dataset_code="IDIL", sheet_name="CPSA1").
+        Each observation carries the release_date of the vintage it came from.
+        """
+        deltas = self._deltas(until=release_date, **filters)
+        latest = deltas.drop_duplicates(KEY_COLS, keep="last")
+        latest = latest[latest["change_type"] != "deleted"]
+        return latest.drop(columns="change_type").sort_values(KEY_COLS, kind="stable").reset_index(drop=True)
+
+    def revision_triangle(self, **filters):
+        """Value of each period in every release: one row per observation key, one column per release.
+
+        Cells repeat the latest value published up to that release and are
+        empty before a period first appears or after it was deleted.
+        """
+        deltas = self._deltas(**filters)
+        releases = [entry["release_date"] for entry in self.releases]
+        if deltas.empty:
+            return pd.DataFrame(columns=KEY_COLS + releases)
+
+        # Pivot the row position of each change, carry it forward across
+        # releases, then look the values up (deletions carry NaN forward)
+        values = deltas["value"].where(deltas["change_type"] != "deleted").to_numpy(dtype=float)
+        keyed = deltas[KEY_COLS].astype(object).fillna("").astype(str)
+        deltas = deltas.assign(position=np.arange(len(deltas)), **{col: keyed[col] for col in KEY_COLS})
+        positions = deltas.pivot_table(index=KEY_COLS, columns="release_date", values="position", aggfunc="last")
+        positions = positions.reindex(columns=releases).ffill(axis=1)
+
+        filled = positions.to_numpy()
+        triangle = np.full(filled.shape, np.nan)
+        present = ~np.isnan(filled)
+        triangle[present] = values[filled[present].astype(int)]
+
+        result = pd.DataFrame(triangle, index=positions.index, columns=releases).reset_index()
+        result["period_key"] = pd.to_numeric(result["period_key"], errors="coerce").astype("Int32")
+        return result.sort_values(KEY_COLS, kind="stable").reset_index(drop=True)
+
+
+def record_current_store(store=None, merged_csv="cleansed/rsi_data_merged.csv", release_date=None):
+    """Record the current merged store as the baseline vintage (release date from the series CSV)."""
+    from load_rsi_data_v2 import series_release_date
+    from rsi_schema import read_merged_csv
+
+    store = store or VintageStore()
+    release_date = release_date or series_release_date()
+    if release_date is None:
+        raise ValueError("The series CSV has no Release date; pass --release-date")
+    store.add_snapshot(release_date, read_merged_csv(merged_csv))
+    return release_date
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query historical RSI releases.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    init = sub.add_parser("init", help="record the current rsi_data_merged as the baseline vintage")
+    init.add_argument("--release-date", help="YYYY-MM-DD (default: Release date of the series CSV)")
+    sub.add_parser("list", help="list recorded vintages")
+    for name in ("asof", "triangle"):
+        query = sub.add_parser(name)
+        if name == "asof":
+            query.add_argument("release_date", help="YYYY-MM-DD")
+        for col in KEY_COLS[:-1]:
+            query.add_argument("--" + col.replace("_", "-"))
+    args = parser.parse_args()
+
+    store = VintageStore()
+    if args.command == "init":
+        print("✅ Recorded vintage", record_current_store(store, release_date=args.release_date))
+    elif args.command == "list":
+        print(pd.DataFrame(store.releases).to_string(index=False))
+    else:
+        filters = {col: getattr(args, col) for col in KEY_COLS[:-1]}
+        if args.command == "asof":
+            print(store.as_of(args.release_date, **filters).to_string(index=False))
+        else:
+            print(store.revision_triangle(**filters).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+# xlsx_stream.py
+
+import argparse
+import datetime
+import re
+import time
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Strings pandas turns into NaN when it parses a sheet (its default na_values)
+NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+# Built-in number formats Excel renders as dates or times
+DATE_FORMAT_IDS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+
+CELL_REF = re.compile(r'([A-Z]+)(\d+)')
+
+
+class CellError(str):
+    """Text of an error cell (#DIV/0!, #N/A, ...), as openpyxl returns it."""
+
+
+def column_index(letters):
+    """Convert a column reference such as 'AB' to a 0-based index."""
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def mangle_columns(names):
+    """Name header cells the way pandas does (Unnamed: i, duplicate.1)."""
+    seen = {}
+    columns = []
+    for i, name in enumerate(names):
+        name = f"Unnamed: {i}" if pd.isna(name) else name
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def _is_date_format(code):
+    """Rough equivalent of openpyxl's is_date_format for custom formats."""
+    code = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', '', code)
+    return bool(re.search(r'[dmyhs]', code, re.IGNORECASE))
+
+
+def _from_excel(serial, date1904):
+    """Convert an Excel serial number to the datetime/time openpyxl returns."""
+    if date1904:
+        epoch = datetime.datetime(1904, 1, 1)
+    elif serial < 60:
+        epoch = datetime.datetime(1899, 12, 31)
+    else:
+        epoch = datetime.datetime(1899, 12, 30)
+    if 0 <= serial < 1:
+        stamp = datetime.datetime(1900, 1, 1) + datetime.timedelta(days=serial)
+        return stamp.time()
+    return epoch + datetime.timedelta(days=serial)
+
+
+class StreamingWorkbook:
+    """Read-only xlsx reader that streams sheet XML row by row.
+
+    Cells are decoded straight from the worksheet XML with iterparse and
+    written into preallocated arrays, so no per-cell Python objects are kept
+    and memory is bounded by the grid being returned. Values are converted to
+    text the way pd.read_excel(header=None, dtype=str) does, so parse() is a
+    drop-in for ExcelFile.parse on the cleaners' calls.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._sheet_paths = self._read_workbook()
+        self.sheet_names = list(self._sheet_paths)
+        self._shared_strings = None
+        self._date_styles = self._read_date_styles()
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_workbook(self):
+        rels = ET.fromstring(self._zip.read('xl/_rels/workbook.xml.rels'))
+        targets = {}
+        for rel in rels.iter(f'{PKG_REL_NS}Relationship'):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target.lstrip('/')
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            targets[rel.get('Id')] = target
+
+        workbook = ET.fromstring(self._zip.read('xl/workbook.xml'))
+        props = workbook.find(f'{NS}workbookPr')
+        self.date1904 = props is not None and props.get('date1904') in ('1', 'true')
+        return {
+            sheet.get('name'): targets[sheet.get(f'{REL_NS}id')]
+            for sheet in workbook.iter(f'{NS}sheet')
+        }
+
+    def _read_date_styles(self):
+        """Return the set of cell style indexes that format numbers as dates."""
+        if 'xl/styles.xml' not in self._zip.namelist():
+            return set()
+        styles = ET.fromstring(self._zip.read('xl/styles.xml'))
+        custom = {
+            int(fmt.get('numFmtId')): fmt.get('formatCode', '')
+            for fmt in styles.iter(f'{NS}numFmt')
+        }
+        date_styles = set()
+        cell_xfs = styles.find(f'{NS}cellXfs')
+        for i, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+            fmt_id = int(xf.get('numFmtId', 0))
+            if fmt_id in DATE_FORMAT_IDS or (fmt_id in custom and _is_date_format(custom[fmt_id])):
+                date_styles.add(i)
+        return date_styles
+
+    @property
+    def shared_strings(self):
+        if self._shared_strings is None:
+            self._shared_strings = []
+            if 'xl/sharedStrings.xml' in self._zip.namelist():
+                with self._zip.open('xl/sharedStrings.xml') as fh:
+                    for _, elem in ET.iterparse(fh):
+                        if elem.tag == f'{NS}si':
+                            self._shared_strings.append(self._text(elem))
+                            elem.clear()
+        return self._shared_strings
+
+    @staticmethod
+    def _text(elem):
+        """Concatenate the text runs of a string item, skipping phonetic hints."""
+        parts = []
+        for child in elem:
+            if child.tag == f'{NS}t':
+                parts.append(child.text or '')
+            elif child.tag == f'{NS}r':
+                parts.extend(t.text or '' for t in child.iter(f'{NS}t'))
+        return ''.join(parts)
+
+    def _cell_value(self, cell):
+        """Return (text, number) for a cell as pandas' dtype=str reading would."""
+        kind = cell.get('t', 'n')
+        if kind == 'inlineStr':
+            inline = cell.find(f'{NS}is')
+            return (self._text(inline) if inline is not None else ''), np.nan
+        v = cell.find(f'{NS}v')
+        if v is None or v.text is None:
+            return '', np.nan
+        text = v.text
+        if kind == 's':
+            return self.shared_strings[int(text)], np.nan
+        if kind == 'str':
+            return text, np.nan
+        if kind == 'b':
+            return str(text == '1'), np.nan
+        if kind == 'e':
+            return CellError(text), np.nan
+        if kind == 'd':
+            return str(datetime.datetime.fromisoformat(text)), np.nan
+
+        number = float(text)
+        if int(cell.get('s', 0)) in self._date_styles:
+            return str(_from_excel(number, self.date1904)), np.nan
+        if '.' not in text and 'e' not in text.lower():
+            return str(int(text)), number
+        if number.is_integer():
+            return str(int(number)), number
+        return str(number), number
+
+    def iter_rows(self, sheet_name, rows=None):
+        """Yield (row_index, [(col_index, text, number), ...]) for each XML row.
+
+        rows=(start, stop) limits the scan to 0-based row indexes in that
+        range; parsing stops as soon as the stop row is reached.
+        """
+        if sheet_name not in self._sheet_paths:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        start, stop = rows if rows is not None else (0, None)
+        with self._zip.open(self._sheet_paths[sheet_name]) as fh:
+            next_row = 0
+            for _, elem in ET.iterparse(fh):
+                if elem.tag != f'{NS}row':
+                    continue
+                row_index = int(elem.get('r', next_row + 1)) - 1
+                next_row = row_index + 1
+                if stop is not None and row_index >= stop:
+                    break
+                if row_index >= start:
+                    cells = []
+                    next_col = 0
+                    for cell in elem.iter(f'{NS}c'):
+                        ref = cell.get('r')
+                        col_index = column_index(CELL_REF.match(ref).group(1)) if ref else next_col
+                        next_col = col_index + 1
+                        text, number = self._cell_value(cell)
+                        cells.append((col_index, text, number))
+                    yield row_index, cells
+                elem.clear()
+
+    def _dimension(self, sheet_name):
+        """Return the (rows, cols) size hint from the sheet's <dimension> tag."""
+        with self._zip.open(self._sheet_paths[sheet_name]) as fh:
+            for _, elem in ET.iterparse(fh, events=('start',)):
+                if elem.tag == f'{NS}dimension':
+                    refs = CELL_REF.findall(elem.get('ref', ''))
+                    if refs:
+                        return int(refs[-1][1]), column_index(refs[-1][0]) + 1
+                if elem.tag == f'{NS}sheetData':
+                    break
+        return 0, 0
+
+    def read_grid(self, sheet_name, rows=None, cols=None):
+        """Return (text, numbers) arrays for a sheet or a window of it.
+
+        text is an object array of strings with NaN for empty cells, numbers a
+        float64 array holding every numeric cell (NaN elsewhere). Without rows
+        or cols the grid is trimmed like pandas trims it; rows=(start, stop)
+        and cols=[...] (0-based positions) return just that window.
+        """
+        start = rows[0] if rows is not None else 0
+        n_rows, n_cols = self._dimension(sheet_name)
+        if rows is not None and rows[1] is not None:
+            n_rows = rows[1] - start
+        else:
+            n_rows = max(n_rows - start, 0)
+        col_pos = None
+        if cols is not None:
+            col_pos = {col: i for i, col in enumerate(cols)}
+            n_cols = len(cols)
+
+        text = np.full((max(n_rows, 1), max(n_cols, 1)), np.nan, dtype=object)
+        numbers = np.full(text.shape, np.nan)
+        height = width = 0
+
+        for row_index, cells in self.iter_rows(sheet_name, rows):
+            r = row_index - start
+            for col_index, value, number in cells:
+                if col_pos is not None:
+                    if col_index not in col_pos:
+                        continue
+                    col_index = col_pos[col_index]
+                if value == '':
+                    continue
+                if r >= text.shape[0] or col_index >= text.shape[1]:
+                    # The <dimension> hint was missing or too small
+                    pad = [(0, max(text.shape[0], r + 1) * 2 - text.shape[0] if r >= text.shape[0] else 0),
+                           (0, max(text.shape[1], col_index + 1) - text.shape[1])]
+                    text = np.pad(text, pad, constant_values=np.nan)
+                    numbers = np.pad(numbers, pad, constant_values=np.nan)
+                # pandas' openpyxl reader turns error cells into NaN, whatever their text
+                text[r, col_index] = np.nan if isinstance(value, CellError) or value in NA_STRINGS else value
+                numbers[r, col_index] = number
+                height = max(height, r + 1)
+                width = max(width, col_index + 1)
+
+        if rows is not None and rows[1] is not None:
+            height = n_rows
+        if cols is not None:
+            width = n_cols
+        return text[:height, :width], numbers[:height, :width]
+
+    def parse(self, sheet_name, header=None, dtype=str, usecols=None, skiprows=0, nrows=None):
+        """Drop-in for ExcelFile.parse(sheet_name, header=..., dtype=str).
+
+        usecols (0-based positions), skiprows and nrows restrict the read to
+        the part of the sheet a cleaner needs.
+        """
+        if dtype is not str:
+            raise ValueError("StreamingWorkbook only serves dtype=str grids")
+        if usecols is not None:
+            usecols = sorted(usecols)  # pandas returns them in sheet order
+        rows = None
+        if skiprows or nrows is not None:
+            extra = 0 if header is None else header + 1
+            rows = (skiprows, None if nrows is None else skiprows + nrows + extra)
+        text, _ = self.read_grid(sheet_name, rows=rows, cols=usecols)
+        df = pd.DataFrame(text, columns=usecols)
+        if header is None:
+            return df
+        data = df.iloc[header + 1:].reset_index(drop=True)
+        data.columns = mangle_columns(df.iloc[header].tolist())
+        return data
+
+
+def peak_rss_mb():
+    """Return this process's peak resident set size in MB, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def check_parity(path):
+    """Names of the sheets whose parse() values differ from pd.ExcelFile.parse(header=None, dtype=str)."""
+    xls = pd.ExcelFile(path, engine="openpyxl")
+    mismatched = []
+    with StreamingWorkbook(path) as wb:
+        for name in wb.sheet_names:
+            expected = xls.parse(name, header=None, dtype=str)
+            try:
+                pd.testing.assert_frame_equal(wb.parse(name), expected, check_dtype=False, check_column_type=False)
+            except AssertionError:
+                mismatched.append(name)
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode every sheet of a workbook and report time and peak RSS.")
+    parser.add_argument("path", nargs="?", default="data/mainreferencetables.xlsx")
+    parser.add_argument("--backend", choices=["stream", "openpyxl"], default="stream")
+    parser.add_argument("--check", action="store_true",
+                        help="compare every sheet with pd.ExcelFile.parse instead of timing")
+    args = parser.parse_args()
+
+    if args.check:
+        mismatched = check_parity(args.path)
+        for name in mismatched:
+            print(f"❌ {name}: differs from pd.ExcelFile.parse")
+        if mismatched:
+            raise SystemExit(1)
+        print("✅ Every sheet matches pd.ExcelFile.parse")
+        return
+
+    start = time.perf_counter()
+    cells = 0
+    if args.backend == "stream":
+        with StreamingWorkbook(args.path) as wb:
+            for name in wb.sheet_names:
+                cells += wb.parse(name).size
+    else:
+        xls = pd.ExcelFile(args.path)
+        for name in xls.sheet_names:
+            cells += xls.parse(name, header=None, dtype=str).size
+    elapsed = time.perf_counter() - start
+    print(f"{args.backend}: {cells:,} cells in {elapsed:.2f}s, peak RSS {peak_rss_mb():.1f} MB")
+
+
+if __name__ == "__main__":
+    main()